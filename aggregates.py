@@ -0,0 +1,187 @@
+import json
+import hashlib
+from collections import Counter
+from firebase_config import get_db_reference
+from db_cache import cached_get
+from archive import load_history
+
+AGG_RECENT_MOODS   = 10   # last emotions kept in order
+AGG_RECENT_JOURNAL = 3    # journal snippets kept for the profile prompt
+AGG_ACTIVE_GOALS   = 5
+
+
+# ─────────────────────────────────────────────
+#  AGGREGATES DOCUMENT
+#  aggregates/{uid} is a compact summary of moods, journal and goals, so
+#  the profile never has to re-read the raw data. Journal and goal writers
+#  update it as they go. Moods are saved every chat turn, so instead they
+#  are folded in when the aggregates are read, from the hot window after
+#  moods_through:
+#    moods           {emotion: count}
+#    transitions     {"sad>anxious": count}
+#    recent_moods    [emotion, ...]          newest last
+#    moods_through   key of the last mood folded in
+#    journal_themes  {dominant_emotion: count}
+#    journal_count   int
+#    recent_journal  [snippet, ...]          newest last
+#    goals           {"active": [{goal, streak, done, checkins}], "completed": int}
+# ─────────────────────────────────────────────
+
+def _path(user_id: str) -> str:
+    return f"aggregates/{user_id}"
+
+
+def _empty() -> dict:
+    return {
+        "moods": {}, "transitions": {}, "recent_moods": [], "moods_through": "",
+        "journal_themes": {}, "journal_count": 0, "recent_journal": [],
+        "goals": {"active": [], "completed": 0},
+    }
+
+
+def _add_mood(agg: dict, emotion: str):
+    recent = list(agg.get("recent_moods") or [])
+    moods = agg.setdefault("moods", {})
+    moods[emotion] = moods.get(emotion, 0) + 1
+    if recent:
+        shift = f"{recent[-1]}>{emotion}"
+        transitions = agg.setdefault("transitions", {})
+        transitions[shift] = transitions.get(shift, 0) + 1
+    agg["recent_moods"] = (recent + [emotion])[-AGG_RECENT_MOODS:]
+
+
+def _add_journal(agg: dict, emotion: str, entry: str):
+    themes = agg.setdefault("journal_themes", {})
+    themes[emotion] = themes.get(emotion, 0) + 1
+    agg["journal_count"] = agg.get("journal_count", 0) + 1
+    recent = list(agg.get("recent_journal") or [])
+    agg["recent_journal"] = (recent + [entry[:100]])[-AGG_RECENT_JOURNAL:]
+
+
+def goal_state(goals: list) -> dict:
+    active = [g for g in goals if g and not g.get("completed")]
+    return {
+        "active": [{
+            "goal": g["goal"],
+            "streak": g.get("streak", 0),
+            "done": sum(1 for c in g.get("checkins", []) if c["status"] == "done"),
+            "checkins": len(g.get("checkins", [])),
+        } for g in active[:AGG_ACTIVE_GOALS]],
+        "completed": sum(1 for g in goals if g and g.get("completed")),
+    }
+
+
+# ─────────────────────────────────────────────
+#  INCREMENTAL UPDATES
+# ─────────────────────────────────────────────
+
+def _update(user_id: str, apply):
+    """
+    Apply `apply(agg)` in a transaction. A user without an aggregates node
+    yet is left alone: load_aggregates builds it from the raw data, which
+    already includes this write.
+    """
+    def txn(current):
+        if current is None:
+            return None
+        agg = dict(_empty(), **current)
+        apply(agg)
+        return agg
+
+    try:
+        get_db_reference(_path(user_id)).transaction(txn)
+    except Exception as e:
+        print(f"[AGGREGATES ERROR] {e}")
+
+
+def record_journal_entry(user_id: str, emotion: str, entry: str):
+    _update(user_id, lambda agg: _add_journal(agg, emotion, entry))
+
+
+def record_goals(user_id: str, goals: list):
+    """Goal writers already hold the full list, so the goal state is simply replaced."""
+    state = goal_state(goals)
+    _update(user_id, lambda agg: agg.update(goals=state))
+
+
+# ─────────────────────────────────────────────
+#  READ / REBUILD
+# ─────────────────────────────────────────────
+
+def rebuild_aggregates(user_id: str) -> dict:
+    """Recompute the aggregates from the full mood and journal history and the goals node."""
+    agg = _empty()
+    for key, mood in load_history(user_id, "moods", keyed=True):
+        _add_mood(agg, mood.get("emotion", "neutral"))
+        agg["moods_through"] = key
+    for entry in load_history(user_id, "journal"):
+        _add_journal(agg, entry.get("dominant_emotion", "neutral"), entry.get("entry", ""))
+    agg["goals"] = goal_state(get_db_reference(f"goals/{user_id}").get() or [])
+    get_db_reference(_path(user_id)).set(agg)
+    return agg
+
+
+def _unfolded_moods(user_id: str, through: str) -> list:
+    """(key, mood) pairs saved after `through`, oldest first; the archive is only read if some were trimmed unfolded."""
+    hot = cached_get(user_id, f"moods/{user_id}") or {}
+    if isinstance(hot, list):
+        hot = {f"-{i:019d}": v for i, v in enumerate(hot) if v is not None}
+    if hot and min(hot) > through:
+        return [(k, m) for k, m in load_history(user_id, "moods", keyed=True) if k > through]
+    return [(k, hot[k]) for k in sorted(hot) if k > through]
+
+
+def _fold_moods(user_id: str, agg: dict) -> dict:
+    pending = _unfolded_moods(user_id, agg["moods_through"])
+    if not pending:
+        return agg
+
+    def txn(current):
+        if current is None:
+            return None
+        current = dict(_empty(), **current)
+        for key, mood in pending:
+            # another reader may have folded some of these in meanwhile
+            if key > current["moods_through"]:
+                _add_mood(current, mood.get("emotion", "neutral"))
+                current["moods_through"] = key
+        return current
+
+    try:
+        folded = get_db_reference(_path(user_id)).transaction(txn)
+        return dict(_empty(), **folded) if folded else agg
+    except Exception as e:
+        print(f"[AGGREGATES ERROR] {e}")
+        return agg
+
+
+def load_aggregates(user_id: str) -> dict:
+    agg = get_db_reference(_path(user_id)).get()
+    if agg is None or "moods_through" not in agg:
+        # nodes from before moods were folded on read already count them
+        return rebuild_aggregates(user_id)
+    return _fold_moods(user_id, dict(_empty(), **agg))
+
+
+def _top(counts: dict, n: int) -> list:
+    return [k for k, _ in Counter(counts or {}).most_common(n)]
+
+
+def signature(agg: dict) -> str:
+    """
+    Coarse fingerprint of what the profile is based on: mood shares in 20%
+    steps, the top shifts and journal themes, and goal progress in buckets.
+    Day-to-day noise leaves it unchanged; a real shift in any of them doesn't.
+    """
+    moods = agg.get("moods") or {}
+    total = sum(moods.values()) or 1
+    basis = {
+        "moods": sorted((e, round(5 * c / total)) for e, c in moods.items()),
+        "shifts": _top(agg.get("transitions"), 3),
+        "themes": _top(agg.get("journal_themes"), 3),
+        "journals": agg.get("journal_count", 0) // 5,
+        "goals": [(g["goal"], min(g["streak"] // 3, 3), g["done"] // 3)
+                  for g in (agg.get("goals") or {}).get("active", [])],
+        "completed": (agg.get("goals") or {}).get("completed", 0),
+    }
+    return hashlib.sha1(json.dumps(basis, sort_keys=True).encode("utf-8")).hexdigest()[:16]
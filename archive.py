@@ -0,0 +1,125 @@
+import json
+import zlib
+import base64
+import time
+from datetime import datetime
+from firebase_config import get_db_reference, new_push_key, as_list
+from db_cache import cached_get, invalidate
+from storage import push_key_time
+
+# Hot windows are trimmed ARCHIVE_BATCH items at a time, so the hot node
+# holds between cap and cap + ARCHIVE_BATCH items and each segment packs
+# a useful number of items.
+ARCHIVE_BATCH = 10
+
+# kind → hot node the archive backs
+HOT_PATHS = {
+    "moods":   "moods/{uid}",
+    "journal": "journal/{uid}",
+    "memory":  "memory/{uid}/summaries",
+}
+
+
+# ─────────────────────────────────────────────
+#  SEGMENTS
+#  archive/{uid}/{kind}/{YYYY-MM}/{push key} = {"data": base64(zlib(json)),
+#  "count": n}. Segments are only ever added, never rewritten, so
+#  concurrent trims can't clobber each other. Each segment holds
+#  [key, item] pairs so duplicates (a trim interrupted before the hot
+#  delete) can be dropped on read.
+# ─────────────────────────────────────────────
+
+def _archive_path(user_id: str, kind: str) -> str:
+    return f"archive/{user_id}/{kind}"
+
+
+def _key_ts(key: str) -> float:
+    """Epoch seconds encoded in a push key; None for migrated legacy keys."""
+    if key.startswith("-000"):
+        return None
+    return push_key_time(key)
+
+
+def _item_ts(key: str, item) -> float:
+    ts = _key_ts(key)
+    if ts is not None:
+        return ts
+    if isinstance(item, dict):
+        if item.get("ts"):
+            return item["ts"]
+        for fmt in ("%d %b %Y, %H:%M", "%d %b %Y"):
+            try:
+                return datetime.strptime(item.get("date", ""), fmt).timestamp()
+            except ValueError:
+                continue
+    return time.time()
+
+
+def _encode(pairs: list) -> str:
+    raw = json.dumps(pairs, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def _decode(data: str) -> list:
+    return json.loads(zlib.decompress(base64.b64decode(data)))
+
+
+def archive_items(user_id: str, kind: str, items: dict):
+    """Write trimmed hot items {key: item} as new segments, one per month they span."""
+    buckets = {}
+    for key in sorted(items):
+        month = datetime.fromtimestamp(_item_ts(key, items[key])).strftime("%Y-%m")
+        buckets.setdefault(month, []).append([key, items[key]])
+    root = _archive_path(user_id, kind)
+    get_db_reference(root).update({
+        f"{month}/{new_push_key()}": {"data": _encode(pairs), "count": len(pairs)}
+        for month, pairs in buckets.items()
+    })
+    invalidate(user_id, root)
+
+
+def archiver(user_id: str, kind: str):
+    """on_trim callback for append_capped."""
+    return lambda items: archive_items(user_id, kind, items)
+
+
+# ─────────────────────────────────────────────
+#  LAZY READS
+#  Only analytics, export and profile generation read the archive; the UI
+#  reads the hot window alone.
+# ─────────────────────────────────────────────
+
+def _archived(user_id: str, kind: str, since: str = None) -> dict:
+    root = _archive_path(user_id, kind)
+    if since:
+        months = get_db_reference(root).order_by_key().start_at(since).get() or {}
+    else:
+        months = cached_get(user_id, root) or {}
+    pairs = {}
+    for month in sorted(months):
+        for segment in as_list(months[month]):
+            for key, item in _decode(segment["data"]):
+                pairs[key] = item
+    return pairs
+
+
+def load_archive(user_id: str, kind: str, since: str = None) -> list:
+    """Archived items oldest first. `since` = "YYYY-MM" skips earlier months."""
+    pairs = _archived(user_id, kind, since)
+    return [pairs[k] for k in sorted(pairs)]
+
+
+def load_history(user_id: str, kind: str, since: str = None, keyed: bool = False) -> list:
+    """
+    Full history for `kind`, oldest first: the archive plus the current hot
+    window. With keyed=True, returns (key, item) pairs.
+    """
+    hot = cached_get(user_id, HOT_PATHS[kind].format(uid=user_id)) or {}
+    if isinstance(hot, list):
+        # legacy list — same keys the hot-node migration gives it
+        hot = {f"-{i:019d}": v for i, v in enumerate(hot) if v is not None}
+    pairs = _archived(user_id, kind, since)
+    pairs.update(hot)
+    if keyed:
+        return [(k, pairs[k]) for k in sorted(pairs)]
+    return [pairs[k] for k in sorted(pairs)]
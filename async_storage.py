@@ -0,0 +1,107 @@
+import os
+import asyncio
+import threading
+import httpx
+from storage import get_storage
+from db_cache import is_cached, cache_put
+from tracing import span
+
+ASYNC_FETCH_TIMEOUT     = float(os.getenv("ASYNC_FETCH_TIMEOUT", "10"))
+ASYNC_FETCH_CONCURRENCY = int(os.getenv("ASYNC_FETCH_CONCURRENCY", "16"))
+
+try:
+    import h2  # noqa: F401 — enables HTTP/2 in httpx
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+# ─────────────────────────────────────────────
+#  EVENT LOOP
+#  One loop on a daemon thread for the whole process, so the pooled
+#  AsyncClient (and its keep-alive connections) outlives each call.
+#  Sync callers hand it coroutines with run_coroutine_threadsafe.
+# ─────────────────────────────────────────────
+
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+
+def _ensure_loop():
+    global _loop, _client
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True, name="async-storage").start()
+            _client = httpx.AsyncClient(
+                http2=_HTTP2,
+                timeout=ASYNC_FETCH_TIMEOUT,
+                limits=httpx.Limits(max_connections=ASYNC_FETCH_CONCURRENCY,
+                                    max_keepalive_connections=ASYNC_FETCH_CONCURRENCY,
+                                    keepalive_expiry=60),
+            )
+    return _loop
+
+
+# ─────────────────────────────────────────────
+#  ASYNC FETCH
+# ─────────────────────────────────────────────
+
+async def _rest_get(storage, path: str, token: str):
+    response = await _client.get(f"{storage.rest_url}/{path}.json",
+                                 headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_many(paths: list) -> dict:
+    """
+    Read several paths concurrently: {path: value}. Firebase goes through the
+    RTDB REST API on the shared client; other backends run their blocking
+    reads on worker threads. A failed path maps to an Exception instance.
+    """
+    storage = get_storage()
+    if getattr(storage, "rest_url", None):
+        token = await asyncio.to_thread(storage.access_token)
+        calls = [_rest_get(storage, path, token) for path in paths]
+    else:
+        calls = [asyncio.to_thread(storage.reference(path).get) for path in paths]
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    return dict(zip(paths, results))
+
+
+def fetch_paths(paths: list) -> dict:
+    """Blocking wrapper around fetch_many for script and job threads."""
+    if not paths:
+        return {}
+    future = asyncio.run_coroutine_threadsafe(fetch_many(list(paths)), _ensure_loop())
+    return future.result(timeout=ASYNC_FETCH_TIMEOUT * 2)
+
+
+# ─────────────────────────────────────────────
+#  PREFETCH
+# ─────────────────────────────────────────────
+
+def prefetch(user_id: str, paths: list):
+    """
+    Fetch the paths this session hasn't cached yet in one concurrent round
+    and seed the read cache, so the loaders that follow (get_user_profile,
+    load_moods, load_goals, ...) are cache hits. Failed paths are left for
+    the loader to read normally. Outside a script run there is no cache to
+    seed, so this only fetches.
+    """
+    missing = [p for p in paths if not is_cached(user_id, p)]
+    if not missing:
+        return
+    with span("db.prefetch", f"{len(missing)} paths"):
+        try:
+            results = fetch_paths(missing)
+        except Exception as e:
+            print(f"[PREFETCH ERROR] {e}")
+            return
+    for path, value in results.items():
+        if isinstance(value, Exception):
+            print(f"[PREFETCH ERROR] {path}: {value}")
+            continue
+        cache_put(user_id, path, value)
@@ -0,0 +1,279 @@
+import re
+import json
+import hmac
+import time
+import uuid
+import base64
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from storage import _config
+
+AUTH_BACKEND        = (_config("AUTH_BACKEND", "firebase") or "firebase").lower()
+AUTH_TIMEOUT        = float(_config("AUTH_TIMEOUT", "10"))
+AUTH_REFRESH_MARGIN = 300    # refresh the ID token this many seconds before it expires
+AUTH_CLOCK_SKEW     = 60
+
+IDENTITY_URL = "https://identitytoolkit.googleapis.com/v1/accounts"
+TOKEN_URL    = "https://securetoken.googleapis.com/v1/token"
+CERTS_URL    = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+
+# ─────────────────────────────────────────────
+#  SESSION DICT
+#  st.session_state.user keeps the Identity Toolkit sign-in fields
+#  (localId, email, idToken, refreshToken, expiresIn) plus expiresAt,
+#  the epoch second the ID token stops being valid.
+# ─────────────────────────────────────────────
+
+def _session(local_id: str, email: str, id_token: str, refresh_token: str, expires_in) -> dict:
+    return {
+        "localId": local_id, "email": email,
+        "idToken": id_token, "refreshToken": refresh_token,
+        "expiresIn": str(expires_in), "expiresAt": time.time() + int(expires_in),
+    }
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _check_claims(claims: dict, project_id: str) -> dict:
+    """The checks Firebase documents for ID tokens beyond the signature and exp/iat."""
+    if claims.get("aud") != project_id:
+        raise ValueError("wrong audience")
+    if claims.get("iss") != f"https://securetoken.google.com/{project_id}":
+        raise ValueError("wrong issuer")
+    if not claims.get("sub"):
+        raise ValueError("missing subject")
+    if claims.get("auth_time", 0) > time.time() + AUTH_CLOCK_SKEW:
+        raise ValueError("auth_time in the future")
+    return claims
+
+
+# ─────────────────────────────────────────────
+#  FIREBASE BACKEND
+#  One pooled HTTPS session for Identity Toolkit, securetoken and the
+#  signing certificates, so logins and refreshes reuse a warm connection.
+#  ID tokens are verified locally against Google's certificates, which are
+#  fetched once per their Cache-Control max-age for the whole process.
+# ─────────────────────────────────────────────
+
+class FirebaseAuth:
+    """Firebase Authentication over its REST API (the production backend)."""
+
+    def __init__(self, api_key: str = None, project_id: str = None):
+        self.api_key = api_key or _config("FIREBASE_API_KEY")
+        self.project_id = project_id or _config("FIREBASE_PROJECT_ID") or self._project_from_service_account()
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=1))
+        self._certs = {}
+        self._certs_expiry = 0.0
+        self._certs_lock = threading.Lock()
+
+    @staticmethod
+    def _project_from_service_account() -> str:
+        try:
+            return json.loads(_config("FIREBASE_JSON") or "{}").get("project_id")
+        except ValueError:
+            return None
+
+    def _post(self, url: str, **kwargs) -> dict:
+        response = self._http.post(url, params={"key": self.api_key}, timeout=AUTH_TIMEOUT, **kwargs)
+        return response.json()
+
+    def sign_in(self, email: str, password: str) -> dict:
+        result = self._post(f"{IDENTITY_URL}:signInWithPassword",
+                            json={"email": email, "password": password, "returnSecureToken": True})
+        if "localId" not in result:
+            return result
+        return _session(result["localId"], result.get("email", email),
+                        result["idToken"], result["refreshToken"], result.get("expiresIn", 3600))
+
+    def send_password_reset(self, email: str) -> dict:
+        return self._post(f"{IDENTITY_URL}:sendOobCode", json={"requestType": "PASSWORD_RESET", "email": email})
+
+    def create_user(self, email: str, password: str) -> str:
+        from firebase_admin import auth
+        return auth.create_user(email=email, password=password).uid
+
+    def refresh(self, user: dict) -> dict:
+        result = self._post(TOKEN_URL, data={"grant_type": "refresh_token",
+                                             "refresh_token": user["refreshToken"]})
+        if "id_token" not in result:
+            raise ValueError(result.get("error", {}).get("message", "refresh failed"))
+        return _session(result["user_id"], user.get("email"),
+                        result["id_token"], result["refresh_token"], result["expires_in"])
+
+    def _signing_certs(self) -> dict:
+        with self._certs_lock:
+            if time.time() >= self._certs_expiry:
+                response = self._http.get(CERTS_URL, timeout=AUTH_TIMEOUT)
+                response.raise_for_status()
+                max_age = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+                self._certs = response.json()
+                self._certs_expiry = time.time() + (int(max_age.group(1)) if max_age else 3600)
+            return self._certs
+
+    def verify(self, id_token: str) -> dict:
+        from google.auth import jwt
+        claims = jwt.decode(id_token, certs=self._signing_certs(), audience=self.project_id,
+                            clock_skew_in_seconds=AUTH_CLOCK_SKEW)
+        return _check_claims(claims, self.project_id)
+
+
+# ─────────────────────────────────────────────
+#  LOCAL STUB
+#  AUTH_BACKEND=local: an in-process stand-in for the same endpoints, for
+#  offline runs and benchmarks. Users live in memory and tokens are HS256
+#  JWTs with Firebase's claim layout, signed with a per-process key.
+# ─────────────────────────────────────────────
+
+class LocalAuth:
+    """Offline auth with the FirebaseAuth interface."""
+
+    def __init__(self, project_id: str = "mindmate-local", token_ttl: int = 3600):
+        self.project_id = project_id
+        self.token_ttl = token_ttl
+        self._key = uuid.uuid4().bytes
+        self._users = {}      # email → {"uid", "salt", "hash"}
+        self._refresh = {}    # refresh token → (uid, email)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(password: str, salt: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 1000)
+
+    def _token(self, uid: str, email: str) -> str:
+        now = int(time.time())
+        header = {"alg": "HS256", "typ": "JWT", "kid": "local"}
+        claims = {
+            "iss": f"https://securetoken.google.com/{self.project_id}", "aud": self.project_id,
+            "sub": uid, "user_id": uid, "email": email,
+            "iat": now, "auth_time": now, "exp": now + self.token_ttl,
+        }
+        signing_input = f"{_b64url(json.dumps(header).encode())}.{_b64url(json.dumps(claims).encode())}"
+        signature = hmac.new(self._key, signing_input.encode("ascii"), hashlib.sha256).digest()
+        return f"{signing_input}.{_b64url(signature)}"
+
+    def _issue(self, uid: str, email: str) -> dict:
+        refresh_token = uuid.uuid4().hex
+        with self._lock:
+            self._refresh[refresh_token] = (uid, email)
+        return _session(uid, email, self._token(uid, email), refresh_token, self.token_ttl)
+
+    def create_user(self, email: str, password: str, uid: str = None) -> str:
+        with self._lock:
+            if email in self._users:
+                raise ValueError("EMAIL_EXISTS")
+            salt = uuid.uuid4().bytes
+            self._users[email] = {"uid": uid or uuid.uuid4().hex[:28], "salt": salt,
+                                  "hash": self._hash(password, salt)}
+            return self._users[email]["uid"]
+
+    def sign_in(self, email: str, password: str) -> dict:
+        user = self._users.get(email)
+        if user is None or not hmac.compare_digest(user["hash"], self._hash(password, user["salt"])):
+            return {"error": {"code": 400, "message": "INVALID_LOGIN_CREDENTIALS"}}
+        return self._issue(user["uid"], email)
+
+    def send_password_reset(self, email: str) -> dict:
+        if email not in self._users:
+            return {"error": {"code": 400, "message": "EMAIL_NOT_FOUND"}}
+        return {"kind": "identitytoolkit#GetOobConfirmationCodeResponse", "email": email}
+
+    def refresh(self, user: dict) -> dict:
+        with self._lock:
+            entry = self._refresh.pop(user.get("refreshToken"), None)
+        if entry is None:
+            raise ValueError("INVALID_REFRESH_TOKEN")
+        return self._issue(*entry)
+
+    def verify(self, id_token: str) -> dict:
+        signing_input, _, signature = id_token.rpartition(".")
+        expected = hmac.new(self._key, signing_input.encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            raise ValueError("bad signature")
+        claims = json.loads(_b64url_decode(signing_input.split(".")[1]))
+        if claims.get("exp", 0) < time.time() - AUTH_CLOCK_SKEW:
+            raise ValueError("token expired")
+        return _check_claims(claims, self.project_id)
+
+
+# ─────────────────────────────────────────────
+#  CLIENT SELECTION
+# ─────────────────────────────────────────────
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_auth_client():
+    """The configured backend: AUTH_BACKEND = "firebase" (default) or "local"."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if AUTH_BACKEND == "local":
+                _client = LocalAuth()
+            elif AUTH_BACKEND == "firebase":
+                _client = FirebaseAuth()
+            else:
+                raise ValueError(f"Unknown AUTH_BACKEND: {AUTH_BACKEND}")
+        return _client
+
+
+def set_auth_client(client):
+    """Swap the backend (e.g. a LocalAuth for benchmarks)."""
+    global _client
+    _client = client
+
+
+# ─────────────────────────────────────────────
+#  API
+# ─────────────────────────────────────────────
+
+def login(email: str, password: str) -> dict:
+    """A session dict on success, otherwise the error response (no "localId")."""
+    try:
+        return get_auth_client().sign_in(email, password)
+    except Exception as e:
+        print(f"[AUTH ERROR] {e}")
+        return {"error": {"message": str(e)}}
+
+
+def send_password_reset(email: str) -> dict:
+    try:
+        return get_auth_client().send_password_reset(email)
+    except Exception as e:
+        print(f"[AUTH ERROR] {e}")
+        return {"error": {"message": str(e)}}
+
+
+def create_user(email: str, password: str) -> str:
+    return get_auth_client().create_user(email, password)
+
+
+def session_user(user: dict) -> dict:
+    """
+    The signed-in session for this rerun, or None if it can't be trusted.
+    The ID token is refreshed only when it is about to expire; otherwise
+    it's verified locally, so a rerun or reconnect costs no network hop.
+    """
+    if not user or not user.get("idToken"):
+        return None
+    client = get_auth_client()
+    try:
+        if user.get("expiresAt", 0) - time.time() < AUTH_REFRESH_MARGIN:
+            user = client.refresh(user)
+        claims = client.verify(user["idToken"])
+    except Exception as e:
+        print(f"[AUTH ERROR] {e}")
+        return None
+    if claims["sub"] != user.get("localId"):
+        return None
+    return user
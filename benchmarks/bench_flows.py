@@ -0,0 +1,252 @@
+"""
+End-to-end flow benchmark: drives app.py headlessly with Streamlit's AppTest
+against a fake Groq client and an in-memory SQLite store that counts every
+read and write.
+
+    python benchmarks/bench_flows.py
+    python benchmarks/bench_flows.py --llm-latency lognormal:-1.2,0.5 --db-latency fixed:0.02
+    python benchmarks/bench_flows.py --out report.json --check benchmarks/flow_thresholds.json
+
+For each user flow it reports wall time, database reads/writes, LLM calls and
+script reruns. With --check it exits 1 if any flow exceeds its thresholds,
+so a change that adds a read or an LLM call to a hot path fails CI. --check
+also runs the component self-checks in check_components.py.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Must be set before the app modules are imported
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("AUTH_BACKEND", "local")
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import storage
+import llm
+import jobs
+import bootstrap
+import auth_client
+from fakes import FakeGroq, CountingStorage, parse_latency
+from check_components import run_checks
+
+APP = os.path.join(ROOT, "app.py")
+USER_ID = "bench-user"
+EMAIL, PASSWORD = "bench@example.com", "bench-password"
+SEED_TS = 1790000000   # 2026-09-21, for timestamps inside seeded items
+
+
+# ─────────────────────────────────────────────
+#  HARNESS
+# ─────────────────────────────────────────────
+
+class Harness:
+    def __init__(self, llm_latency: str, db_latency: str, seed: int):
+        self.db = CountingStorage(storage.SQLiteStorage(":memory:"), parse_latency(db_latency, seed))
+        storage.set_storage(self.db)
+        self.llm = FakeGroq(parse_latency(llm_latency, seed))
+        llm.set_client(self.llm)
+        auth_client.set_auth_client(auth_client.LocalAuth())
+        auth_client.get_auth_client().create_user(EMAIL, PASSWORD, uid=USER_ID)
+        self.reruns = 0
+        # every script run calls set_page_config exactly once
+        original = st.set_page_config
+
+        def counting_set_page_config(*args, **kwargs):
+            self.reruns += 1
+            return original(*args, **kwargs)
+        st.set_page_config = counting_set_page_config
+
+    def seed(self):
+        """A fresh store holding one user, in the shapes the app itself writes."""
+        self.db.inner = storage.SQLiteStorage(":memory:")
+        self.db.inner.write_many({
+            f"users/{USER_ID}": {"name": "Bench", "email": EMAIL, "age": 24, "age_group": "adult"},
+            f"memory/{USER_ID}/summaries": {
+                f"-{i:019d}": {"text": f"Bullet number {i}", "count": 1,
+                               "first_seen": SEED_TS, "last_seen": SEED_TS}
+                for i in range(6)
+            },
+            f"moods/{USER_ID}": {
+                f"-{i:019d}": {"emotion": e, "ts": SEED_TS + i * 3600,
+                               "date": "21 Sep 2026", "time": f"{9 + i:02d}:00"}
+                for i, e in enumerate(["sad", "anxious", "neutral", "happy", "stressed"])
+            },
+            f"goals/{USER_ID}": [{
+                "goal": "Sleep before midnight", "created": "21 Sep 2026",
+                "deadline": "28 Sep 2026", "completed": False, "streak": 1,
+                "checkins": [{"date": "22 Sep 2026", "status": "done"}],
+            }],
+            f"chats/{USER_ID}": {
+                f"-{i:019d}": {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i}"}
+                for i in range(40)
+            },
+        })
+        # as after `python bootstrap.py`, so login measures the steady state
+        bootstrap.backfill_user(USER_ID)
+
+    def reset(self):
+        self.db.reset()
+        self.llm.calls = 0
+        self.reruns = 0
+
+    def snapshot(self, seconds: float) -> dict:
+        return {
+            "wall_ms": round(seconds * 1000, 1),
+            "reads": self.db.reads,
+            "writes": self.db.writes,
+            "llm_calls": self.llm.calls,
+            "reruns": self.reruns,
+        }
+
+
+def _wait_for_jobs(timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while jobs._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _open(view: str = None) -> AppTest:
+    """A logged-in session that has already rendered once (warm session cache)."""
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["user"] = auth_client.login(EMAIL, PASSWORD)
+    if view:
+        at.session_state["view"] = view
+    at.run()
+    return at
+
+
+# ─────────────────────────────────────────────
+#  FLOWS
+#  Each returns the AppTest after the action; setup is excluded from counts.
+# ─────────────────────────────────────────────
+
+def flow_login(h: Harness):
+    h.reset()
+    start = time.perf_counter()
+    at = _open()
+    return at, time.perf_counter() - start
+
+
+def flow_chat_turn(h: Harness):
+    at = _open()
+    h.reset()
+    start = time.perf_counter()
+    at.chat_input[0].set_value("Work has been really stressful this week").run()
+    return at, time.perf_counter() - start
+
+
+def flow_cbt_step(h: Harness):
+    at = _open("🧘 Therapy Session")
+    next(b for b in at.button if b.label == "▶️ Start Session").click().run()
+    h.reset()
+    start = time.perf_counter()
+    at.chat_input[0].set_value("My manager criticised my report in front of everyone").run()
+    return at, time.perf_counter() - start
+
+
+def flow_journal_submit(h: Harness):
+    at = _open("📖 Journal")
+    h.reset()
+    start = time.perf_counter()
+    at.text_area[0].input("Couldn't sleep again, kept thinking about the deadline.")
+    next(b for b in at.button if b.label == "✨ Submit Entry").click().run()
+    _wait_for_jobs()
+    at.run()
+    return at, time.perf_counter() - start
+
+
+def flow_goal_checkin(h: Harness):
+    at = _open("🎯 Goals")
+    h.reset()
+    start = time.perf_counter()
+    at.button(key="done_0").click().run()
+    return at, time.perf_counter() - start
+
+
+def flow_profile_refresh(h: Harness):
+    at = _open("🧬 My Profile")
+    h.reset()
+    start = time.perf_counter()
+    next(b for b in at.button if b.label == "🔄 Generate / Refresh My Profile").click().run()
+    _wait_for_jobs()
+    at.run()
+    return at, time.perf_counter() - start
+
+
+FLOWS = {
+    "login": flow_login,
+    "chat_turn": flow_chat_turn,
+    "cbt_step": flow_cbt_step,
+    "journal_submit": flow_journal_submit,
+    "goal_checkin": flow_goal_checkin,
+    "profile_refresh": flow_profile_refresh,
+}
+
+
+# ─────────────────────────────────────────────
+#  REPORT
+# ─────────────────────────────────────────────
+
+def run(flows: list, llm_latency: str, db_latency: str, seed: int) -> dict:
+    h = Harness(llm_latency, db_latency, seed)
+    report = {}
+    for name in flows:
+        h.seed()
+        at, seconds = FLOWS[name](h)
+        result = h.snapshot(seconds)
+        if at.exception:
+            result["exception"] = [e.message for e in at.exception]
+        report[name] = result
+    return report
+
+
+def check(report: dict, thresholds: dict) -> list:
+    failures = []
+    for flow, limits in thresholds.items():
+        result = report.get(flow)
+        if result is None:
+            continue
+        if "exception" in result:
+            failures.append(f"{flow}: raised {result['exception']}")
+        for metric, limit in limits.items():
+            value = result.get(metric.removeprefix("max_"))
+            if value is not None and value > limit:
+                failures.append(f"{flow}: {metric.removeprefix('max_')}={value} > {limit}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flows", nargs="+", choices=list(FLOWS), default=list(FLOWS))
+    parser.add_argument("--llm-latency", default="fixed:0.05",
+                        help="fixed:S | uniform:A,B | lognormal:MU,SIGMA (seconds)")
+    parser.add_argument("--db-latency", default="fixed:0")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write the JSON report here as well as stdout")
+    parser.add_argument("--check", help="thresholds JSON; exit 1 on regression")
+    args = parser.parse_args()
+
+    report = run(args.flows, args.llm_latency, args.db_latency, args.seed)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+
+    if args.check:
+        with open(args.check) as f:
+            failures = check(report, json.load(f))
+        failures += run_checks()
+        for failure in failures:
+            print(f"[REGRESSION] {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
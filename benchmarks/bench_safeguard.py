@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: compiled safeguard matcher vs the original any(k in msg) scan.
+
+    python benchmarks/bench_safeguard.py
+    python benchmarks/bench_safeguard.py --sizes 17 1000 5000 20000
+
+Phrase lists are padded with synthetic phrases to show how each
+implementation scales with list size. Also checks is_crisis on spacing and
+spelling evasions (and look-alike safe messages); exits 1 on a wrong verdict.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safeguard import PhraseMatcher, is_crisis, _CRISIS_KEYWORDS
+
+MESSAGES = [
+    "I've been feeling really low since my exams and I can't sleep",
+    "Honestly I just want to talk about my day, work was long",
+    "My friends ignored me again today and it hurt more than I expected",
+    "Sometimes I think everyone would be better off without me",
+    "I got a promotion but I'm anxious about the new responsibilities",
+    "We argued again last night and I said things I regret",
+] * 20
+
+# (message, is_crisis verdict expected)
+EVASIONS = [
+    ("I want to kill myself", True),
+    ("kill my self", True),
+    ("killmyself", True),
+    ("k i l l my self", True),
+    ("k i l l m y s e l f", True),
+    ("kill-my-self tonight", True),
+    ("K!LL    MYSELF", True),
+    ("kiiill myself", True),
+    ("wanttodie", True),
+    ("We can hang my self-portrait in the hall", False),
+    ("I skilled myself up this year", False),
+    ("Nice selfie, kill my selfie filter", False),
+    ("I am fine, just tired", False),
+]
+
+_WORDS = ["alone", "never", "again", "tired", "night", "pain", "lost", "stop", "leave",
+          "world", "sleep", "forever", "gone", "nothing", "break", "heavy", "dark"]
+
+
+def synthetic_phrases(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    phrases = set(_CRISIS_KEYWORDS)
+    while len(phrases) < n:
+        phrases.add(" ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 4))) + f" {rng.randint(0, 10**6)}")
+    return list(phrases)
+
+
+def legacy_match(phrases: list, message: str) -> bool:
+    msg = message.lower()
+    return any(k in msg for k in phrases)
+
+
+def time_per_message(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for m in MESSAGES:
+            fn(m)
+    return (time.perf_counter() - start) / (rounds * len(MESSAGES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[17, 1000, 5000, 20000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        phrases = synthetic_phrases(size)
+        start = time.perf_counter()
+        matcher = PhraseMatcher(phrases, compact=True)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_us = time_per_message(lambda m: legacy_match(phrases, m), args.rounds)
+        compiled_us = time_per_message(matcher.search, args.rounds)
+        agree = all(legacy_match(phrases, m) == matcher.search(m) for m in MESSAGES)
+        results.append({
+            "phrases": size,
+            "legacy_us_per_msg": round(legacy_us, 2),
+            "compiled_us_per_msg": round(compiled_us, 2),
+            "compiled_build_ms": round(build_ms, 1),
+            "same_verdicts": agree,
+        })
+    print(json.dumps(results, indent=2))
+
+    wrong = [(m, expected) for m, expected in EVASIONS if is_crisis(m) != expected]
+    for message, expected in wrong:
+        print(f"[VERDICT WRONG] {message!r}: expected {expected}", file=sys.stderr)
+    print(f"{len(EVASIONS) - len(wrong)}/{len(EVASIONS)} evasion verdicts correct")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
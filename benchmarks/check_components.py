@@ -0,0 +1,198 @@
+"""
+Self-checks for the pieces the flow benchmark leans on but doesn't observe
+directly: the SQLite backend, push keys, the bootstrap mirror, the
+single-write chat turn, the archive codec, memory consolidation and the
+LocalAuth token checks. Runs against in-memory stores only.
+
+    python benchmarks/check_components.py
+
+Exits 1 on the first failing check in each group and lists them all.
+bench_flows.py --check runs these before the flows.
+"""
+import os
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import storage
+import auth_client
+from firebase_config import get_db_reference, write_paths, append_capped, load_keyed
+from archive import _encode, _decode, archive_items, load_history
+from memory import (
+    save_memory_summary, load_memory_bullets, save_mood, save_chat_turn, load_chat_page,
+    MEMORY_TOP_K, BOOTSTRAP_MOODS,
+)
+from goals import save_goal, checkin_goal
+from bootstrap import backfill_user
+from fakes import CountingStorage
+
+
+def _fresh_db():
+    storage.set_storage(storage.SQLiteStorage(":memory:"))
+
+
+# ─────────────────────────────────────────────
+#  CHECKS
+# ─────────────────────────────────────────────
+
+def check_sqlite_backend():
+    _fresh_db()
+    ref = get_db_reference("a")
+    ref.set({"b": {"c": 1, "d": "x"}, "e": [10, 20]})
+    assert ref.get() == {"b": {"c": 1, "d": "x"}, "e": [10, 20]}, ref.get()
+    assert ref.get(shallow=True) == {"b": True, "e": True}
+    ref.update({"b/c": None, "b/f": True})
+    assert get_db_reference("a/b").get() == {"d": "x", "f": True}
+    get_db_reference("q").set({"k1": 1, "k2": 2, "k3": 3, "k4": 4})
+    assert get_db_reference("q").order_by_key().limit_to_last(2).get() == {"k3": 3, "k4": 4}
+    assert get_db_reference("q").order_by_key().start_at("k2").end_at("k3").get() == {"k2": 2, "k3": 3}
+    get_db_reference("n").transaction(lambda v: (v or 0) + 1)
+    get_db_reference("n").transaction(lambda v: (v or 0) + 1)
+    assert get_db_reference("n").get() == 2
+    get_db_reference("a").delete()
+    assert get_db_reference("a").get() is None
+
+
+def check_push_keys():
+    keys = [storage.new_push_key() for _ in range(2000)]
+    assert len(set(keys)) == len(keys), "duplicate push keys"
+    assert keys == sorted(keys), "push keys out of order within one process"
+    assert abs(storage.push_key_time(keys[-1]) - time.time()) < 5
+
+
+def check_keyed_nodes():
+    _fresh_db()
+    get_db_reference("moods/u").set([{"emotion": "sad"}, {"emotion": "happy"}])
+    data = load_keyed("moods/u")
+    assert [v["emotion"] for _, v in sorted(data.items())] == ["sad", "happy"], data
+    added, dropped = append_capped("moods/u", [{"emotion": "calm"}], cap=2)
+    items = get_db_reference("moods/u").get()
+    assert len(items) == 2 and list(added)[0] in items and dropped, items
+    # no cached copy (a background job): every append must still keep the cap
+    for i in range(200):
+        append_capped("journal/u", [{"entry": i}], cap=30, slack=10)
+        assert len(get_db_reference("journal/u").get(shallow=True)) <= 40
+    assert len(get_db_reference("journal/u").get(shallow=True)) >= 30
+
+
+def check_bootstrap_mirror():
+    _fresh_db()
+    write_paths({"users/u/last_seen": "2026-10-01", "mental_profile/u": {"summary": "x"}, "chats/u/k": {}})
+    assert get_db_reference("bootstrap/u/profile/last_seen").get() == "2026-10-01"
+    assert get_db_reference("bootstrap/u/mental_profile").get() == {"summary": "x"}
+    assert get_db_reference("bootstrap/u/chats").get() is None
+
+    # growing nodes are mirrored as bounded projections by their writers
+    for i in range(BOOTSTRAP_MOODS + 15):
+        save_mood("u", "sad" if i < BOOTSTRAP_MOODS + 14 else "happy")
+    moods = get_db_reference("bootstrap/u/moods").get()
+    assert len(moods) == BOOTSTRAP_MOODS and moods[-1]["emotion"] == "happy", moods
+    save_memory_summary("u", "\n".join(f"- Fact number {i} about topic{i}" for i in range(12)))
+    assert len(get_db_reference("bootstrap/u/memory").get()) == MEMORY_TOP_K
+    save_goal("u", "walk")
+    checkin_goal("u", 0, "done")
+    goals = get_db_reference("bootstrap/u/goals").get()
+    assert goals["active"] == [{"goal": "walk", "streak": 1, "done": 1, "checkins": 1}], goals  # counts, not history
+
+    # a backfill builds the same projections from the source nodes
+    before = get_db_reference("bootstrap/u").get()
+    node = backfill_user("u")
+    assert {s: node[s] for s in ("moods", "goals")} == {s: before[s] for s in ("moods", "goals")}
+    assert sorted(node["memory"]) == sorted(before["memory"])
+
+
+def check_chat_turn():
+    _fresh_db()
+    save_mood("u", "neutral")
+    db = CountingStorage(storage.get_storage())
+    storage.set_storage(db)
+    save_chat_turn("u", [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}], "happy")
+    assert db.writes == 1, f"{db.writes} writes for one chat turn"
+    messages, _ = load_chat_page("u")
+    assert [m["role"] for m in messages] == ["user", "assistant"], messages
+    assert get_db_reference("bootstrap/u/moods").get()[-1]["emotion"] == "happy"
+
+
+def check_archive_codec():
+    pairs = [["-k1", {"emotion": "sad", "ts": 1790000000}], ["-k2", "plain bullet"]]
+    assert _decode(_encode(pairs)) == pairs
+    _fresh_db()
+    old = {storage.new_push_key(): {"emotion": "sad"}}
+    archive_items("u", "moods", old)
+    get_db_reference("moods/u").set({storage.new_push_key(): {"emotion": "happy"}})
+    history = load_history("u", "moods")
+    assert [m["emotion"] for m in history] == ["sad", "happy"], history
+
+
+def check_memory_consolidation():
+    _fresh_db()
+    save_memory_summary("u", "- Not sleeping well\n- Stressed about exams\n- Fighting with mother")
+    # updates and contradictions are new facts, not repeats
+    save_memory_summary("u", "- Sleeping well lately after therapy\n- No longer stressed about exams\n"
+                             "- Made up with mother after fighting")
+    assert len(load_memory_bullets("u")) == 6, load_memory_bullets("u")
+    # a restatement merges and keeps the newer wording
+    save_memory_summary("u", "- Still not sleeping well")
+    bullets = get_db_reference("memory/u/summaries").get()
+    merged = [b for b in bullets.values() if b["text"] == "Still not sleeping well"]
+    assert len(bullets) == 6 and merged and merged[0]["count"] == 2, bullets
+    assert "Not sleeping well" not in load_memory_bullets("u")
+
+
+def check_local_auth():
+    client = auth_client.LocalAuth(token_ttl=3600)
+    auth_client.set_auth_client(client)
+    uid = client.create_user("a@example.com", "secret123")
+    assert "localId" not in auth_client.login("a@example.com", "wrong")
+    session = auth_client.login("a@example.com", "secret123")
+    assert session["localId"] == uid
+    assert auth_client.session_user(session) is session
+    tampered = dict(session, idToken=session["idToken"][:-4] + "AAAA")
+    assert auth_client.session_user(tampered) is None
+    assert auth_client.session_user(dict(session, localId="someone-else")) is None
+
+    expired = auth_client.LocalAuth(token_ttl=-3600)
+    expired._key = client._key
+    stale = dict(session, idToken=expired._token(uid, "a@example.com"), expiresAt=time.time() + 3600)
+    assert auth_client.session_user(stale) is None, "expired token accepted"
+
+    near_expiry = dict(session, expiresAt=time.time() + 10)
+    refreshed = auth_client.session_user(near_expiry)
+    assert refreshed and refreshed["refreshToken"] != session["refreshToken"]
+    assert auth_client.session_user(near_expiry) is None, "refresh token reused"
+
+
+CHECKS = [
+    check_sqlite_backend,
+    check_push_keys,
+    check_keyed_nodes,
+    check_bootstrap_mirror,
+    check_chat_turn,
+    check_archive_codec,
+    check_memory_consolidation,
+    check_local_auth,
+]
+
+
+def run_checks() -> list:
+    failures = []
+    for check in CHECKS:
+        try:
+            check()
+        except Exception:
+            failures.append(f"{check.__name__}: {traceback.format_exc(limit=2).strip()}")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = run_checks()
+    for failure in failures:
+        print(f"[CHECK FAILED] {failure}", file=sys.stderr)
+    print(f"{len(CHECKS) - len(failures)}/{len(CHECKS)} component checks passed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,108 @@
+"""
+Offline evaluation of emotion detection: local classifier vs the Groq path.
+
+    python benchmarks/eval_emotion.py                 # local classifier only
+    python benchmarks/eval_emotion.py --llm           # also call Groq (needs GROQ_API_KEY)
+    python benchmarks/eval_emotion.py --thresholds 0.3 0.5 0.7 --llm
+
+For each threshold it reports accuracy of the hybrid detector (local, falling
+back to the LLM below the threshold) and the share of messages that would
+still need an LLM call.
+
+emotion_sample.jsonl was written alongside the lexicon; emotion_holdout.jsonl
+was not, and tags each row with a case (plain / negation / sarcasm). Judge
+changes on the holdout: the key figure is local_accuracy_when_confident,
+since a confident wrong label never reaches the LLM. max_miss_confidence is
+the highest confidence of a wrong local label; brain's default
+EMOTION_CONFIDENCE_THRESHOLD sits above the holdout's.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion_classifier import classify_emotion
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLES = [os.path.join(HERE, "emotion_sample.jsonl"), os.path.join(HERE, "emotion_holdout.jsonl")]
+
+
+def load_sample(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(rows: list, thresholds: list, with_llm: bool) -> dict:
+    start = time.perf_counter()
+    local = [classify_emotion(r["text"]) for r in rows]
+    local_ms = (time.perf_counter() - start) * 1000 / len(rows)
+
+    llm, llm_ms = None, None
+    if with_llm:
+        from brain import detect_emotion_llm
+        start = time.perf_counter()
+        llm = [detect_emotion_llm(r["text"]) for r in rows]
+        llm_ms = (time.perf_counter() - start) * 1000 / len(rows)
+
+    def accuracy(preds):
+        return sum(p == r["label"] for p, r in zip(preds, rows)) / len(rows)
+
+    report = {
+        "samples": len(rows),
+        "local": {"accuracy": round(accuracy([l for l, _ in local]), 3), "ms_per_message": round(local_ms, 4)},
+    }
+    if llm is not None:
+        report["llm"] = {"accuracy": round(accuracy(llm), 3), "ms_per_message": round(llm_ms, 1)}
+
+    report["hybrid"] = []
+    for t in thresholds:
+        confident = [conf >= t for _, conf in local]
+        entry = {
+            "threshold": t,
+            "llm_call_rate": round(1 - sum(confident) / len(rows), 3),
+            "local_accuracy_when_confident": round(
+                sum(l == r["label"] for (l, _), r, c in zip(local, rows, confident) if c) / max(sum(confident), 1), 3
+            ),
+            "confident_misses": sum(l != r["label"] for (l, _), r, c in zip(local, rows, confident) if c),
+        }
+        if llm is not None:
+            preds = [l if c else m for (l, _), m, c in zip(local, llm, confident)]
+            entry["accuracy"] = round(accuracy(preds), 3)
+        report["hybrid"].append(entry)
+
+    cases = sorted({r["case"] for r in rows if "case" in r})
+    if cases:
+        report["by_case"] = {}
+        for case in cases:
+            picked = [(l, r) for l, r in zip(local, rows) if r.get("case") == case]
+            report["by_case"][case] = {
+                "samples": len(picked),
+                "local_accuracy": round(sum(l == r["label"] for (l, _), r in picked) / len(picked), 3),
+                "mean_confidence": round(sum(c for (_, c), _ in picked) / len(picked), 3),
+            }
+
+    report["max_miss_confidence"] = max((c for (l, c), r in zip(local, rows) if l != r["label"]), default=0.0)
+    report["local_misses"] = [
+        {"text": r["text"], "label": r["label"], "local": l, "confidence": c}
+        for (l, c), r in zip(local, rows) if l != r["label"]
+    ]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample", nargs="+", default=SAMPLES)
+    parser.add_argument("--llm", action="store_true", help="also evaluate the Groq path")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.5, 0.7, 0.9])
+    args = parser.parse_args()
+
+    report = {os.path.basename(path): evaluate(load_sample(path), args.thresholds, args.llm)
+              for path in args.sample}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
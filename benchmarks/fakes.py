@@ -0,0 +1,177 @@
+"""
+Deterministic stand-ins for Groq and the database, used by the flow benchmarks.
+"""
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+# ─────────────────────────────────────────────
+#  LATENCY DISTRIBUTIONS
+# ─────────────────────────────────────────────
+
+def parse_latency(spec: str, seed: int = 0):
+    """
+    "fixed:0.3", "uniform:0.1,0.5" or "lognormal:MU,SIGMA" (seconds) → a
+    callable returning one sample. Seeded, so runs are repeatable.
+    """
+    rng = random.Random(seed)
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+# ─────────────────────────────────────────────
+#  FAKE GROQ
+# ─────────────────────────────────────────────
+
+_CANNED = [
+    ("Respond with a JSON object", (
+        '{"reply": "I hear you. That sounds like a lot to carry right now.", '
+        '"emotion": "stressed", "risk_flag": false}'
+    )),
+    ("emotion detector", "stressed"),
+    ("memory assistant", "- Stressed about upcoming exams\n- Sleeping badly this week"),
+    ("Analyse this journal entry", (
+        "EMOTION: stressed\n"
+        "PATTERN: Pressure from deadlines keeps coming up.\n"
+        "REFLECTION: What would make this week feel lighter?\n"
+        "ENCOURAGEMENT: You're doing better than you think, Bench."
+    )),
+    ("mental health profile", (
+        "TRIGGERS: Deadlines, uncertainty\n"
+        "STRENGTHS: Self-awareness, persistence\n"
+        "SUPPORT_STYLE: Calm, practical conversations.\n"
+        "GROWTH: Letting go of perfectionism.\n"
+        "MESSAGE: Bench, you keep showing up. That matters."
+    )),
+    ("accountability partner", "Three days in a row, Bench — that's real momentum."),
+    ("Suggest ONE small", "Take a 10 minute walk after lunch"),
+    ("insight card", "🌱 **Your Session Insight**\n\n**What happened:** A hard week."),
+]
+_DEFAULT = "I hear you. That sounds like a lot to carry right now — what feels heaviest today?"
+
+
+class FakeGroq:
+    """Implements client.chat.completions.create for plain and streamed calls."""
+
+    def __init__(self, latency, token_latency: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _reply_for(self, messages: list) -> str:
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        for marker, text in _CANNED:
+            if marker in system:
+                return text
+        return _DEFAULT
+
+    def _create(self, model=None, messages=None, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        text = self._reply_for(messages or [])
+        time.sleep(self.latency())
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+        return self._stream(text)
+
+    def _stream(self, text: str):
+        for word in text.split(" "):
+            time.sleep(self.token_latency)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+
+
+# ─────────────────────────────────────────────
+#  COUNTING STORAGE
+# ─────────────────────────────────────────────
+
+class CountingStorage:
+    """Wraps a storage backend, counting reads/writes and adding latency per call."""
+
+    def __init__(self, inner, latency=lambda: 0.0):
+        self.inner = inner
+        self.latency = latency
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.reads = self.writes = 0
+
+    def _count(self, kind: str):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+        time.sleep(self.latency())
+
+    def reference(self, path: str):
+        return _CountingRef(self, self.inner.reference(path))
+
+
+class _CountingRef:
+    def __init__(self, storage: CountingStorage, ref):
+        self._storage = storage
+        self._ref = ref
+
+    @property
+    def key(self):
+        return self._ref.key
+
+    def child(self, path):
+        return _CountingRef(self._storage, self._ref.child(path))
+
+    def get(self, *args, **kwargs):
+        self._storage._count("reads")
+        return self._ref.get(*args, **kwargs)
+
+    def set(self, value):
+        self._storage._count("writes")
+        return self._ref.set(value)
+
+    def update(self, value):
+        self._storage._count("writes")
+        return self._ref.update(value)
+
+    def push(self, value=""):
+        self._storage._count("writes")
+        return _CountingRef(self._storage, self._ref.push(value))
+
+    def delete(self):
+        self._storage._count("writes")
+        return self._ref.delete()
+
+    def transaction(self, fn):
+        self._storage._count("reads")
+        self._storage._count("writes")
+        return self._ref.transaction(fn)
+
+    def order_by_key(self):
+        return _CountingQuery(self._storage, self._ref.order_by_key())
+
+
+class _CountingQuery:
+    def __init__(self, storage: CountingStorage, query):
+        self._storage = storage
+        self._query = query
+
+    def __getattr__(self, name):
+        method = getattr(self._query, name)
+
+        def chained(*args, **kwargs):
+            result = method(*args, **kwargs)
+            return self if result is self._query else result
+        return chained
+
+    def get(self):
+        self._storage._count("reads")
+        return self._query.get()
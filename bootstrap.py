@@ -0,0 +1,122 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from firebase_config import get_db_reference, bootstrap_path, BOOTSTRAP_SCHEMA, BOOTSTRAP_SECTIONS, BOOTSTRAP_COPIED
+from db_cache import cache_put
+from async_storage import fetch_paths
+from tracing import span
+from memory import latest_moods, top_memory
+from aggregates import goal_state
+
+
+# ─────────────────────────────────────────────
+#  SESSION BOOTSTRAP
+#  bootstrap/{uid} = {"schema": n, "profile": ..., "moods": ..., "memory": ...,
+#  "goals": ..., "mental_profile": ...}: copies of the profile and profile
+#  snapshot, and bounded projections of the rest — the latest moods, the
+#  top memory bullets and the active goals without check-in history. The
+#  writers keep it in step, so a new session seeds its cache from this one
+#  small node instead of one read per node. A missing or older schema is
+#  rebuilt from the source nodes.
+# ─────────────────────────────────────────────
+
+# section → projection of its source node; copied sections aren't listed
+PROJECTIONS = {
+    "moods":  latest_moods,
+    "memory": top_memory,
+    "goals":  lambda goals: goal_state(goals or []),
+}
+
+
+def _path(user_id: str) -> str:
+    return f"bootstrap/{user_id}"
+
+
+def _sources(user_id: str) -> dict:
+    return {section: src.format(uid=user_id) for section, src in BOOTSTRAP_SECTIONS.items()}
+
+
+def backfill_user(user_id: str) -> dict:
+    """Rebuild bootstrap/{uid} from the source nodes (read concurrently) and store it."""
+    sources = _sources(user_id)
+    results = fetch_paths(list(sources.values()))
+    node = {"schema": BOOTSTRAP_SCHEMA}
+    for section, path in sources.items():
+        value = results[path]
+        if isinstance(value, Exception):
+            raise value
+        node[section] = PROJECTIONS[section](value) if section in PROJECTIONS else value
+    get_db_reference(_path(user_id)).set(node)
+    return node
+
+
+def bootstrap_session(user_id: str):
+    """
+    Seed this session's read cache for the first render from one read of
+    bootstrap/{uid}: copied sections under their source path, projections
+    under their bootstrap path. Runs once per session and user; later
+    reruns use the cache and the per-view prefetch as before.
+    """
+    if get_script_run_ctx() is None or st.session_state.get("_bootstrapped") == user_id:
+        return
+    with span("db.bootstrap", user_id):
+        try:
+            node = get_db_reference(_path(user_id)).get() or {}
+            if node.get("schema") != BOOTSTRAP_SCHEMA:
+                node = backfill_user(user_id)
+        except Exception as e:
+            print(f"[BOOTSTRAP ERROR] {e}")
+            return
+    for section, path in _sources(user_id).items():
+        cache_put(user_id, path if section in BOOTSTRAP_COPIED else bootstrap_path(user_id, section),
+                  node.get(section))
+    cache_put(user_id, f"users/{user_id}/last_seen", (node.get("profile") or {}).get("last_seen"))
+    st.session_state["_bootstrapped"] = user_id
+
+
+# ─────────────────────────────────────────────
+#  BULK MIGRATION
+#  python bootstrap.py [--workers 8] [--dry-run] [--force] [uid ...]
+#  Backfills every user (or the given ones) ahead of time, so no session
+#  pays for its own backfill. Re-run it after bumping BOOTSTRAP_SCHEMA.
+# ─────────────────────────────────────────────
+
+def _needs_backfill(user_id: str) -> bool:
+    return get_db_reference(f"{_path(user_id)}/schema").get() != BOOTSTRAP_SCHEMA
+
+
+def migrate(user_ids: list, workers: int = 8, dry_run: bool = False, force: bool = False) -> dict:
+    """Backfill the given users; returns {"done", "skipped", "failed"} counts."""
+    counts = {"done": 0, "skipped": 0, "failed": 0}
+
+    def one(user_id):
+        try:
+            if not force and not _needs_backfill(user_id):
+                return "skipped"
+            if not dry_run:
+                backfill_user(user_id)
+            return "done"
+        except Exception as e:
+            print(f"[BOOTSTRAP ERROR] {user_id}: {e}")
+            return "failed"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for outcome in pool.map(one, user_ids):
+            counts[outcome] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill bootstrap/{uid} session nodes.")
+    parser.add_argument("user_ids", nargs="*", help="only these users (default: everyone under users/)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true", help="report who needs a backfill without writing")
+    parser.add_argument("--force", action="store_true", help="rebuild nodes that are already current")
+    args = parser.parse_args()
+
+    user_ids = args.user_ids or sorted((get_db_reference("users").get(shallow=True) or {}).keys())
+    counts = migrate(user_ids, workers=args.workers, dry_run=args.dry_run, force=args.force)
+    verb = "would backfill" if args.dry_run else "backfilled"
+    print(f"{verb} {counts['done']}, current {counts['skipped']}, failed {counts['failed']} "
+          f"of {len(user_ids)} users")
@@ -1,16 +1,26 @@
-from groq import Groq
 import os
-from dotenv import load_dotenv
+import json
+import threading
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future
+from llm import chat_completion, stream_completion
+from tracing import register_metrics
 from safeguard import is_crisis, get_crisis_response, is_off_topic, get_off_topic_response
+from emotion_classifier import EMOTIONS, classify_emotion
+from context_builder import (
+    build_context, truncate_to_tokens, CONTEXT_TOKEN_BUDGET, MEMORY_TOKEN_SHARE
+)
 
-load_dotenv()
+# Local classifier confidence below which detect_emotion asks the LLM instead.
+# 0.7 is above every wrong local label on benchmarks/emotion_holdout.jsonl.
+EMOTION_CONFIDENCE_THRESHOLD = float(os.getenv("EMOTION_CONFIDENCE_THRESHOLD", "0.7"))
 
-# Read from .env — if not found, fall back to direct key
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Opt-in: one JSON-mode completion per turn returns reply, emotion and risk flag
+STRUCTURED_TURN = os.getenv("STRUCTURED_TURN", "") == "1"
 
-client = Groq(api_key=GROQ_API_KEY)
-
-MODEL="llama-3.3-70b-versatile"
+# Side calls (emotion detection) that run alongside the streamed reply
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="brain")
 
 
 # ─────────────────────────────────────────────
@@ -78,8 +88,8 @@ def generate_memory_summary(chat_history: list):
     )
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        return chat_completion(
+            "brain.memory_summary",
             messages=[
                 {
                     "role": "system",
@@ -96,7 +106,6 @@ def generate_memory_summary(chat_history: list):
             max_tokens=120,
             temperature=0.3,
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"[MEMORY ERROR] {e}")
         return None
@@ -106,10 +115,8 @@ def generate_memory_summary(chat_history: list):
 #  MAIN RESPONSE GENERATOR
 # ─────────────────────────────────────────────
 
-def generate_ai_response(user_message: str, age: int,
-                          chat_history: list = None,
-                          long_term_memory: str = "") -> str:
-
+def _guard_response(user_message: str):
+    """Canned reply for crisis / off-topic messages, else None."""
     # 1. Crisis check — always first
     if is_crisis(user_message):
         return get_crisis_response()
@@ -118,44 +125,205 @@ def generate_ai_response(user_message: str, age: int,
     if is_off_topic(user_message):
         return get_off_topic_response()
 
-    # 3. Build system prompt with memory
-    system_prompt = build_system_prompt(age, long_term_memory)
+    return None
 
-    # 4. Build messages — full history for context
-    messages = [{"role": "system", "content": system_prompt}]
 
-    if chat_history:
-        for msg in chat_history[-20:]:
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-    else:
-        messages.append({"role": "user", "content": user_message})
+def _build_messages(user_message: str, age: int,
+                    chat_history: list = None,
+                    long_term_memory: str = "") -> list:
+    # 3. Build system prompt with memory (capped to its share of the budget)
+    memory = truncate_to_tokens(long_term_memory, int(CONTEXT_TOKEN_BUDGET * MEMORY_TOKEN_SHARE))
+    system_prompt = build_system_prompt(age, memory)
+
+    # 4. Fill the token budget with the newest turns; older ones are summarised
+    history = chat_history or [{"role": "user", "content": user_message}]
+    return build_context(system_prompt, history)
+
+
+def generate_ai_response(user_message: str, age: int,
+                          chat_history: list = None,
+                          long_term_memory: str = "") -> str:
+
+    guarded = _guard_response(user_message)
+    if guarded:
+        return guarded
+
+    messages = _build_messages(user_message, age, chat_history, long_term_memory)
 
     # 5. Call Groq — print real error if it fails
     try:
-        completion = client.chat.completions.create(
-            model=MODEL,
+        return chat_completion(
+            "brain.reply",
             messages=messages,
             temperature=0.75,
             max_tokens=300,
         )
-        return completion.choices[0].message.content.strip()
 
     except Exception as e:
         print(f"[GROQ ERROR] {e}")  # this will show in your terminal
         return f"⚠️ Groq Error: {str(e)}"  # show real error in chat for debugging
 
+
+def stream_ai_response(user_message: str, age: int,
+                       chat_history: list = None,
+                       long_term_memory: str = ""):
+    """Same as generate_ai_response, but yields text chunks as Groq produces them."""
+    guarded = _guard_response(user_message)
+    if guarded:
+        yield guarded
+        return
+
+    messages = _build_messages(user_message, age, chat_history, long_term_memory)
+
+    try:
+        yield from stream_completion(
+            "brain.reply_stream",
+            messages=messages,
+            temperature=0.75,
+            max_tokens=300,
+        )
+
+    except Exception as e:
+        print(f"[GROQ ERROR] {e}")
+        yield f"⚠️ Groq Error: {str(e)}"
+
+# ─────────────────────────────────────────────
+#  CHAT TURN PIPELINE
+# ─────────────────────────────────────────────
+
+def start_chat_turn(user_message: str, age: int,
+                    chat_history: list = None,
+                    long_term_memory: str = "",
+                    structured: bool = None):
+    """
+    Start one chat turn. Emotion detection is submitted to a worker thread
+    while the caller consumes the reply stream, so the two Groq calls overlap.
+    With `structured` (default STRUCTURED_TURN), a single JSON-mode call
+    returns both instead. Returns (reply_token_iterator, emotion_future).
+    """
+    if structured is None:
+        structured = STRUCTURED_TURN
+    if structured and not _guard_response(user_message):
+        emotion_future = Future()
+        tokens = _structured_turn(user_message, age, chat_history, long_term_memory, emotion_future)
+        return tokens, emotion_future
+
+    # copy_context carries the rerun trace into the worker thread
+    emotion_future = _executor.submit(contextvars.copy_context().run, detect_emotion, user_message)
+    tokens = stream_ai_response(user_message, age, chat_history, long_term_memory)
+    return tokens, emotion_future
+
+
+# ─────────────────────────────────────────────
+#  STRUCTURED TURN
+#  One completion in JSON mode instead of reply + emotion calls. Any
+#  failure (API error, bad JSON, schema mismatch) falls back to the
+#  two-call path; fallbacks are counted by reason.
+# ─────────────────────────────────────────────
+
+_TURN_FORMAT = (
+    "\n\nRespond with a JSON object and nothing else, with exactly these keys:\n"
+    '{"reply": "<your message to the user>", '
+    '"emotion": "<one of: ' + ", ".join(EMOTIONS) + '>", '
+    '"risk_flag": <true if the user may be at risk of self-harm, else false>}'
+)
+
+_turn_stats = {"turns": 0, "fallbacks": Counter()}
+_turn_lock = threading.Lock()
+
+
+def parse_turn(text: str) -> dict:
+    """Validate a structured-turn completion; raises ValueError naming what was wrong."""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError("invalid_json")
+    if not isinstance(data, dict):
+        raise ValueError("not_object")
+    reply = data.get("reply")
+    if not isinstance(reply, str) or not reply.strip():
+        raise ValueError("bad_reply")
+    emotion = str(data.get("emotion", "")).strip().lower()
+    if emotion not in EMOTIONS:
+        raise ValueError("bad_emotion")
+    if not isinstance(data.get("risk_flag"), bool):
+        raise ValueError("bad_risk_flag")
+    return {"reply": reply.strip(), "emotion": emotion, "risk_flag": data["risk_flag"]}
+
+
+def _record_turn(fallback_reason: str = None):
+    with _turn_lock:
+        _turn_stats["turns"] += 1
+        if fallback_reason:
+            _turn_stats["fallbacks"][fallback_reason] += 1
+
+
+def get_turn_metrics() -> dict:
+    """Structured turns attempted, fallbacks by reason, and the fallback rate."""
+    with _turn_lock:
+        turns = _turn_stats["turns"]
+        fallbacks = dict(_turn_stats["fallbacks"])
+    total = sum(fallbacks.values())
+    return {"turns": turns, "fallbacks": fallbacks,
+            "fallback_rate": round(total / turns, 3) if turns else 0.0}
+
+
+def _turn_samples(metrics: dict) -> list:
+    return [("mindmate_structured_turns_total", {}, metrics["turns"], "counter")] + [
+        ("mindmate_structured_turn_fallbacks_total", {"reason": reason}, n, "counter")
+        for reason, n in sorted(metrics["fallbacks"].items())
+    ]
+
+
+register_metrics("structured_turns", get_turn_metrics, _turn_samples)
+
+
+def _structured_turn(user_message: str, age: int, chat_history: list,
+                     long_term_memory: str, emotion_future: Future):
+    messages = _build_messages(user_message, age, chat_history, long_term_memory)
+    messages[0] = {"role": "system", "content": messages[0]["content"] + _TURN_FORMAT}
+    try:
+        turn = parse_turn(chat_completion(
+            "brain.turn_json",
+            messages=messages,
+            temperature=0.75,
+            max_tokens=400,
+            response_format={"type": "json_object"},
+        ))
+    except Exception as e:
+        reason = str(e) if isinstance(e, ValueError) else "api_error"
+        print(f"[TURN FALLBACK] {reason}: {e}")
+        _record_turn(reason)
+        inner = _executor.submit(contextvars.copy_context().run, detect_emotion, user_message)
+        inner.add_done_callback(lambda f: emotion_future.set_result(f.result()))
+        yield from stream_ai_response(user_message, age, chat_history, long_term_memory)
+        return
+
+    _record_turn()
+    emotion_future.set_result(turn["emotion"])
+    # The model's risk flag backs up the keyword check, which already passed
+    yield get_crisis_response() if turn["risk_flag"] else turn["reply"]
+
+
 # ─────────────────────────────────────────────
 #  EMOTION DETECTOR
 # ─────────────────────────────────────────────
 
-def detect_emotion(message: str) -> str:
-    """Silently detect emotion from user message."""
+def detect_emotion(message: str, threshold: float = None) -> str:
+    """Silently detect emotion from user message.
+    Uses the local classifier, falling back to Groq only when it is unsure."""
+    if threshold is None:
+        threshold = EMOTION_CONFIDENCE_THRESHOLD
+    emotion, confidence = classify_emotion(message)
+    if confidence >= threshold:
+        return emotion
+    return detect_emotion_llm(message)
+
+
+def detect_emotion_llm(message: str) -> str:
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        emotion = chat_completion(
+            "brain.emotion",
             messages=[
                 {
                     "role": "system",
@@ -170,9 +338,8 @@ def detect_emotion(message: str) -> str:
             max_tokens=5,
             temperature=0.1,
         )
-        emotion = response.choices[0].message.content.strip().lower()
-        valid = ["anxious", "sad", "angry", "lonely", "hopeful", "stressed", "happy", "neutral"]
-        return emotion if emotion in valid else "neutral"
+        emotion = emotion.lower()
+        return emotion if emotion in EMOTIONS else "neutral"
     except Exception as e:
         print(f"[EMOTION ERROR] {e}")
-        return "neutral"
\ No newline at end of file
+        return "neutral"
@@ -0,0 +1,122 @@
+import os
+import re
+
+# Prompt budget for one chat completion (system prompt + memory + history)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1800"))
+MEMORY_TOKEN_SHARE   = 0.2    # max share of the budget for long-term memory
+SUMMARY_TOKEN_BUDGET = 160    # reserved for the summary of older turns
+MESSAGE_OVERHEAD     = 4      # role / separator tokens per chat message
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+# ─────────────────────────────────────────────
+#  TOKEN COUNTING
+#  Local approximation of a BPE tokenizer: one token per punctuation
+#  mark, one per ~4 characters of a word. Close enough for budgeting.
+# ─────────────────────────────────────────────
+
+def count_tokens(text: str) -> int:
+    return sum(
+        1 if not piece[0].isalnum() else (len(piece) + 3) // 4
+        for piece in _TOKEN_RE.findall(text or "")
+    )
+
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Keep lines from the top of `text` while they fit in `budget`; the line that doesn't fit is cut by words."""
+    if count_tokens(text) <= budget:
+        return text
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            words = []
+            for word in line.split():
+                used += count_tokens(word)
+                if used > budget:
+                    break
+                words.append(word)
+            if words:
+                kept.append(" ".join(words) + "…")
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+# ─────────────────────────────────────────────
+#  ROLLING SUMMARY
+# ─────────────────────────────────────────────
+
+def _compress(content: str, max_words: int = 18) -> str:
+    first = _SENTENCE_RE.split(content.strip(), maxsplit=1)[0]
+    words = first.split()
+    return " ".join(words[:max_words]) + ("…" if len(words) > max_words else "")
+
+
+def summarize_turns(turns: list, budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """
+    Extractive summary of turns that no longer fit in the window: the
+    opening sentence of each user message, newest first until the budget
+    is spent, then put back in chronological order.
+    """
+    lines, used = [], 0
+    for msg in reversed(turns):
+        if msg["role"] != "user":
+            continue
+        line = f"- {_compress(msg['content'])}"
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(reversed(lines))
+
+
+# ─────────────────────────────────────────────
+#  CONTEXT BUILDER
+# ─────────────────────────────────────────────
+
+def build_context(system_prompt: str, chat_history: list, budget: int = None) -> list:
+    """
+    Fill `budget` tokens with the system prompt and the newest turns, walking
+    from newest to oldest. Turns that don't fit are folded into a compressed
+    summary appended to the system prompt, so the prompt size stays bounded
+    regardless of conversation length.
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    remaining = budget - count_tokens(system_prompt) - MESSAGE_OVERHEAD - SUMMARY_TOKEN_BUDGET
+
+    window = []
+    for i in range(len(chat_history) - 1, -1, -1):
+        msg = {"role": chat_history[i]["role"], "content": chat_history[i]["content"]}
+        cost = message_tokens(msg)
+        if cost > remaining:
+            if not window:
+                # the current message alone is over budget — keep its start
+                msg["content"] = truncate_to_tokens(msg["content"], max(remaining, 0))
+                window.append(msg)
+                i -= 1
+            older = chat_history[:i + 1]
+            break
+        window.append(msg)
+        remaining -= cost
+    else:
+        older = []
+
+    # the window must open with a user turn
+    while window and window[-1]["role"] != "user" and len(window) > 1:
+        older = older + [window.pop()]
+
+    if older:
+        summary = summarize_turns(older)
+        if summary:
+            system_prompt += f"\n\nEarlier in this conversation, the user said:\n{summary}"
+
+    return [{"role": "system", "content": system_prompt}] + list(reversed(window))
@@ -0,0 +1,161 @@
+import os
+import time
+import copy
+import threading
+from collections import OrderedDict
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from firebase_config import get_db_reference
+from tracing import register_metrics
+
+CACHE_TTL     = float(os.getenv("DB_CACHE_TTL", "300"))
+CACHE_ENTRIES = int(os.getenv("DB_CACHE_ENTRIES", "64"))
+
+
+# ─────────────────────────────────────────────
+#  READ CACHE
+# ─────────────────────────────────────────────
+
+# Hits and misses across every session's cache, for the metrics export
+_totals = {"hits": 0, "misses": 0}
+_totals_lock = threading.Lock()
+
+
+def _count(kind: str):
+    with _totals_lock:
+        _totals[kind] += 1
+
+
+class ReadCache:
+    """LRU cache of database reads with a per-entry TTL."""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, count: bool = True):
+        """Return (found, value) for a live entry."""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.entries.pop(key, None)
+            if count:
+                self.misses += 1
+                _count("misses")
+            return False, None
+        self.entries.move_to_end(key)
+        if count:
+            self.hits += 1
+            _count("hits")
+        return True, copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, path: str = None):
+        if path is not None:
+            self.entries.pop((user_id, path), None)
+            return
+        for key in [k for k in self.entries if k[0] == user_id]:
+            del self.entries[key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self.entries),
+        }
+
+
+def _session_cache():
+    """The current session's cache, or None outside a script run (e.g. worker threads)."""
+    if get_script_run_ctx() is None:
+        return None
+    if "_db_cache" not in st.session_state:
+        st.session_state["_db_cache"] = ReadCache()
+    return st.session_state["_db_cache"]
+
+
+# ─────────────────────────────────────────────
+#  READ-THROUGH / WRITE-THROUGH
+# ─────────────────────────────────────────────
+
+def cached_get(user_id: str, path: str):
+    cache = _session_cache()
+    if cache is None:
+        return get_db_reference(path).get()
+    found, value = cache.get((user_id, path))
+    if found:
+        return value
+    value = get_db_reference(path).get()
+    cache.put((user_id, path), value)
+    return value
+
+
+def is_cached(user_id: str, path: str) -> bool:
+    cache = _session_cache()
+    return cache is not None and cache.get((user_id, path), count=False)[0]
+
+
+def peek(user_id: str, path: str) -> tuple:
+    """(found, value) from this session's cache, never reading the database."""
+    cache = _session_cache()
+    if cache is None:
+        return False, None
+    return cache.get((user_id, path), count=False)
+
+
+def cache_put(user_id: str, path: str, value):
+    """Record a value just written to `path` so the next read skips the network."""
+    cache = _session_cache()
+    if cache is not None:
+        cache.put((user_id, path), value)
+
+
+def cache_patch(user_id: str, path: str, added: dict, dropped: list = ()):
+    """Apply a keyed-child append/trim to a cached node, or drop it if it isn't a keyed node."""
+    cache = _session_cache()
+    if cache is None:
+        return
+    found, value = cache.get((user_id, path), count=False)
+    if not found or (value is not None and not isinstance(value, dict)):
+        cache.invalidate(user_id, path)
+        return
+    value = dict(value or {})
+    value.update(added)
+    for key in dropped:
+        value.pop(key, None)
+    cache.put((user_id, path), value)
+
+
+def invalidate(user_id: str, path: str = None):
+    """Drop one cached path, or every path for the user when `path` is None."""
+    cache = _session_cache()
+    if cache is not None:
+        cache.invalidate(user_id, path)
+
+
+def cache_stats() -> dict:
+    cache = _session_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def process_cache_stats() -> dict:
+    """Hits, misses and hit rate summed over every session in this process."""
+    with _totals_lock:
+        hits, misses = _totals["hits"], _totals["misses"]
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 3) if total else 0.0}
+
+
+register_metrics("db_cache", process_cache_stats, lambda s: [
+    ("mindmate_db_cache_hits_total", {}, s["hits"], "counter"),
+    ("mindmate_db_cache_misses_total", {}, s["misses"], "counter"),
+])
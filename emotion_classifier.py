@@ -0,0 +1,187 @@
+import re
+
+# Same label set as brain.detect_emotion
+EMOTIONS = ["anxious", "sad", "angry", "lonely", "hopeful", "stressed", "happy", "neutral"]
+
+
+# ─────────────────────────────────────────────
+#  LEXICON
+#  word / phrase → weight. A trailing * matches any word with that prefix.
+# ─────────────────────────────────────────────
+
+_LEXICON = {
+    "anxious": {
+        "anxious": 3, "anxiety": 3, "nervous": 2.5, "worried": 2.5, "worry": 2, "worrying": 2.5,
+        "scared": 2, "afraid": 2, "fear*": 2, "panic*": 3, "uneasy": 2, "restless": 1.5,
+        "overthink*": 2.5, "what if": 1.5, "on edge": 2.5, "can't breathe": 2.5, "dread*": 2.5,
+        "terrified": 2.5, "shaky": 1.5, "heart racing": 2.5, "tense": 1.5,
+    },
+    "sad": {
+        "sad": 3, "sadness": 3, "unhappy": 2.5, "depressed": 3, "depressing": 2.5, "down": 1,
+        "cry*": 2.5, "tears": 2, "heartbroken": 3, "heartbreak": 3, "miserable": 3,
+        "hopeless": 2.5, "empty": 2, "grief": 3, "griev*": 3, "lost": 1, "miss": 1.5,
+        "missing": 1.5, "hurt": 1.5, "hurts": 1.5, "broke up": 2.5, "passed away": 3,
+        "died": 2.5, "low": 1, "numb": 2, "disappointed": 2,
+    },
+    "angry": {
+        "angry": 3, "anger": 3, "mad": 2.5, "furious": 3, "pissed": 3, "annoyed": 2.5,
+        "annoying": 2, "irritat*": 2.5, "frustrat*": 2, "hate": 2.5, "rage": 3,
+        "unfair": 2, "sick of": 2.5, "fed up": 2.5, "livid": 3, "resent*": 2.5,
+        "yell*": 1.5, "shout*": 1.5,
+    },
+    "lonely": {
+        "lonely": 3, "loneliness": 3, "alone": 2.5, "isolated": 3, "isolat*": 2.5,
+        "no friends": 3, "nobody": 2, "no one": 2, "left out": 2.5, "ignored": 2,
+        "invisible": 2, "abandon*": 2.5, "by myself": 2, "no one cares": 3,
+        "don't belong": 2.5, "miss my": 1.5,
+    },
+    "hopeful": {
+        "hope": 2.5, "hopeful": 3, "hoping": 2.5, "optimistic": 3, "looking forward": 3,
+        "better": 1.5, "getting better": 3, "improv*": 2, "progress": 2, "excited": 2,
+        "can do": 1.5, "try again": 2, "new start": 2.5, "fresh start": 2.5,
+        "motivated": 2.5, "confident": 2, "believe": 1.5, "will be okay": 2.5,
+    },
+    "stressed": {
+        "stress": 3, "stressed": 3, "stressful": 3, "pressure": 2.5, "overwhelm*": 3,
+        "burnout": 3, "burnt out": 3, "burned out": 3, "exhausted": 2, "tired": 1.5,
+        "deadline*": 2.5, "exam*": 2, "too much": 2, "workload": 2.5, "busy": 1.5,
+        "swamped": 2.5, "can't cope": 2.5, "no time": 2, "drained": 2, "hectic": 2,
+    },
+    "happy": {
+        "happy": 3, "glad": 2.5, "great": 2, "good": 1, "amazing": 2.5, "awesome": 2.5,
+        "wonderful": 2.5, "joy*": 2.5, "grateful": 2.5, "thankful": 2.5, "love": 1.5,
+        "fun": 2, "proud": 2.5, "relieved": 2, "calm": 1.5, "peaceful": 2,
+        "fantastic": 2.5, "smil*": 2, "laugh*": 2, "best day": 3, "feel good": 2.5,
+    },
+    "neutral": {
+        "okay": 1, "ok": 1, "fine": 1, "nothing much": 2, "not much": 1.5,
+        "just wanted": 1, "hi": 1, "hello": 1, "hey": 1, "normal": 1.5, "alright": 1,
+    },
+}
+
+# A negator covers the rest of its clause: "I can't remember the last time I felt good"
+_NEGATORS = {"not", "no", "never", "don't", "dont", "isn't", "isnt", "wasn't", "wasnt",
+             "can't", "cant", "won't", "wont", "didn't", "didnt", "hardly", "without", "nothing"}
+
+# A negated positive word reads as low mood ("not happy", "no hope")
+_NEGATED_FLIP = {"happy": "sad", "hopeful": "sad", "neutral": None}
+
+# Words and phrases that make a lexicon reading unreliable: they undercut
+# what follows ("used to love", "anymore") or are common sarcasm markers
+# ("oh great"). Each one halves the confidence, and so does each negated
+# term, so these messages fall through to the LLM.
+_DOUBT_CUES = {"anymore", "no longer", "used to", "yeah right", "oh great",
+               "just great", "great job", "thanks a lot", "as if", "so much fun", "love how",
+               "love it when", "totally fine", "i guess"}
+
+# An upbeat opening clause before the real news is the usual shape of
+# sarcasm: "Wonderful, the landlord raised the rent again". Such an opener
+# counts as one doubt, and as two when nothing after it is positive too.
+_POSITIVE = {"happy", "hopeful"}
+_OPENER_MAX_TOKENS = 3
+
+_TOKEN_RE = re.compile(r"[a-z']+")
+_CLAUSE_RE = re.compile(r"[,.;:!?()\n]+|\bbut\b|—")
+
+
+def _compile(lexicon: dict):
+    exact, prefixes = {}, {}
+    for emotion, terms in lexicon.items():
+        for term, weight in terms.items():
+            target = prefixes if term.endswith("*") else exact
+            key = term.rstrip("*")
+            target.setdefault(key, []).append((emotion, weight))
+    return exact, prefixes, sorted({len(p) for p in prefixes})
+
+
+_EXACT, _PREFIXES, _PREFIX_LENGTHS = _compile(_LEXICON)
+
+
+def _term_hits(token: str):
+    hits = _EXACT.get(token, [])
+    if " " in token:
+        return hits
+    for n in _PREFIX_LENGTHS:
+        if n <= len(token) and token[:n] in _PREFIXES:
+            hits = hits + _PREFIXES[token[:n]]
+    return hits
+
+
+# ─────────────────────────────────────────────
+#  CLASSIFIER
+# ─────────────────────────────────────────────
+
+def _clause_scores(tokens: list, scores: dict) -> int:
+    """Add one clause's lexicon hits to `scores`; returns its doubt count."""
+    doubt = 0
+    negated = False
+    for i, token in enumerate(tokens):
+        grams = [token]
+        if i + 1 < len(tokens):
+            grams.append(f"{token} {tokens[i + 1]}")
+        if i + 2 < len(tokens):
+            grams.append(f"{token} {tokens[i + 1]} {tokens[i + 2]}")
+
+        doubt += sum(1 for gram in grams if gram in _DOUBT_CUES)
+        for gram in grams:
+            for emotion, weight in _term_hits(gram):
+                if not negated:
+                    scores[emotion] += weight
+                    continue
+                # "not sad", "never worried": the term's emotion is denied,
+                # not expressed, and what is meant instead is left to the LLM
+                doubt += 1
+                flipped = _NEGATED_FLIP.get(emotion)
+                if flipped:
+                    scores[flipped] += weight * 0.5
+        negated = negated or token in _NEGATORS
+    return doubt
+
+
+def _score(message: str) -> tuple:
+    """
+    (scores per emotion, doubt): doubt counts negated terms, _DOUBT_CUES
+    and a sarcastic upbeat opener.
+    """
+    text = message.lower().replace("’", "'")
+    clauses = [c for c in (_TOKEN_RE.findall(part) for part in _CLAUSE_RE.split(text)) if c]
+    scores = dict.fromkeys(EMOTIONS, 0.0)
+    doubt = 0
+
+    for tokens in clauses:
+        doubt += _clause_scores(tokens, scores)
+
+    if len(clauses) > 1 and len(clauses[0]) <= _OPENER_MAX_TOKENS:
+        opener = dict.fromkeys(EMOTIONS, 0.0)
+        _clause_scores(clauses[0], opener)
+        gained = {e for e in EMOTIONS if opener[e]}
+        if gained and gained <= _POSITIVE:
+            doubt += 1 if any(scores[e] > opener[e] for e in _POSITIVE) else 2
+
+    # Shouting / repeated exclamation nudges towards the stronger emotions
+    if message.count("!") >= 2 or (message.isupper() and len(message) > 8):
+        scores["angry"] += 0.5
+    return scores, doubt
+
+
+def score_emotions(message: str) -> dict:
+    """Lexicon scores per emotion for a message (1-3 word n-grams, negation-aware)."""
+    return _score(message)[0]
+
+
+def classify_emotion(message: str) -> tuple:
+    """
+    Return (label, confidence) using the local lexicon model.
+    Confidence is the winning score's share of the total evidence, damped
+    when there is little evidence and halved per negation or doubt cue,
+    so callers can defer to the LLM.
+    """
+    scores, doubt = _score(message)
+    total = sum(scores.values())
+    if total == 0:
+        return "neutral", 0.0
+
+    label = max(scores, key=scores.get)
+    share = scores[label] / total
+    evidence = min(scores[label] / 3.0, 1.0)
+    return label, round(share * evidence * 0.5 ** doubt, 3)
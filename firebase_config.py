@@ -1,23 +1,133 @@
-import firebase_admin
-from firebase_admin import credentials, db, auth
-import streamlit as st
-import json
-import tempfile
-import os
-
-if not firebase_admin._apps:
-    firebase_json = json.loads(st.secrets["FIREBASE_JSON"])
-    
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(firebase_json, f)
-        temp_path = f.name
-    
-    cred = credentials.Certificate(temp_path)
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": st.secrets["FIREBASE_DB_URL"]
-    })
-    
-    os.unlink(temp_path)
+from storage import get_storage, new_push_key
+from tracing import TracedReference
+
+# Initialise the configured backend up front (Firebase needs to be ready
+# before firebase_admin.auth is used on the login screen).
+get_storage()
+
 
 def get_db_reference(path):
-    return db.reference(path)
\ No newline at end of file
+    return TracedReference(get_storage().reference(path))
+
+
+# ─────────────────────────────────────────────
+#  SESSION BOOTSTRAP MIRROR
+#  bootstrap/{uid} holds what a session needs on its first render, so it
+#  can start with one read. Small nodes are copied: write_paths mirrors
+#  their writes in the same atomic update. Growing nodes are kept as a
+#  bounded projection (latest moods, top bullets, active goals) that their
+#  writer rebuilds and includes in the same update.
+# ─────────────────────────────────────────────
+
+BOOTSTRAP_SCHEMA = 2
+
+# bootstrap section → source node
+BOOTSTRAP_SECTIONS = {
+    "profile":        "users/{uid}",
+    "moods":          "moods/{uid}",
+    "memory":         "memory/{uid}/summaries",
+    "goals":          "goals/{uid}",
+    "mental_profile": "mental_profile/{uid}",
+}
+# Sections that are straight copies of their source; the rest are projections
+BOOTSTRAP_COPIED = ("profile", "mental_profile")
+_SECTION_PARTS = {section: BOOTSTRAP_SECTIONS[section].split("/") for section in BOOTSTRAP_COPIED}
+
+
+def bootstrap_path(user_id: str, section: str) -> str:
+    return f"bootstrap/{user_id}/{section}"
+
+
+def bootstrap_mirror(path: str):
+    """bootstrap/{uid}/{section}/... for a path inside a copied node, else None."""
+    parts = [p for p in path.split("/") if p]
+    for section, template in _SECTION_PARTS.items():
+        if len(parts) >= len(template) and all(t == "{uid}" or t == p for t, p in zip(template, parts)):
+            uid = parts[template.index("{uid}")]
+            return "/".join(["bootstrap", uid, section] + parts[len(template):])
+    return None
+
+
+def write_paths(changes: dict):
+    """Apply {absolute path: value or None} as one multi-path update from the root, mirrored into bootstrap/{uid}."""
+    update = dict(changes)
+    for path, value in changes.items():
+        mirror = bootstrap_mirror(path)
+        if mirror:
+            update[mirror] = value
+    get_db_reference("/").update(update)
+
+
+# ─────────────────────────────────────────────
+#  KEYED-CHILD HELPERS
+# ─────────────────────────────────────────────
+
+def as_list(data) -> list:
+    """Children of a node in key order — handles keyed children and legacy lists."""
+    if not data:
+        return []
+    if isinstance(data, dict):
+        return [data[k] for k in sorted(data)]
+    return [item for item in data if item is not None]
+
+
+def append_capped(path: str, items: list, cap: int, slack: int = 0, on_trim=None, held=None,
+                  also: dict = None) -> tuple:
+    """
+    Append `items` under `path` as new keyed children in one write, then drop
+    the oldest children beyond `cap`. Keys are unique and deletes are by key,
+    so concurrent sessions appending to the same node never lose each other's
+    items. Returns (added: {key: item}, dropped: [key]).
+
+    With `slack`, trimming waits until the node exceeds cap + slack and then
+    trims back to `cap` in one go. `on_trim({key: item})` is called with the
+    trimmed items before they are deleted (e.g. to archive them). `also`
+    is more {path: value} changes to write in the same update as the append.
+
+    `held` is the node as the caller already has it (e.g. its cached copy):
+    the keys are only probed once that plus the new items passes cap +
+    slack, so most appends are a single round trip. Without it (a cold
+    cache, a background job) every append probes the keys, so the node
+    never runs past cap + slack.
+    """
+    ref = get_db_reference(path)
+    added = {new_push_key(): item for item in items}
+    write_paths({**(also or {}), **{f"{path}/{k}": v for k, v in added.items()}})
+
+    # unknown, or a legacy list that needs migrating: always probe
+    known = isinstance(held, dict) and not any(k.isdigit() for k in held)
+    if known and len(held) + len(added) <= cap + slack:
+        return added, []
+
+    keys = list((ref.get(shallow=True) or {}).keys())
+    if any(k.isdigit() for k in keys):
+        keys = _migrate_legacy_list(path)
+
+    dropped = sorted(keys)[:-cap] if len(keys) > cap + slack else []
+    if dropped:
+        if on_trim is not None:
+            on_trim(ref.order_by_key().end_at(dropped[-1]).get() or {})
+        write_paths({f"{path}/{k}": None for k in dropped})
+    return added, dropped
+
+
+def load_keyed(path: str) -> dict:
+    """A node's children as {key: item}, migrating a legacy list first."""
+    data = get_db_reference(path).get() or {}
+    if isinstance(data, list) or any(k.isdigit() for k in data):
+        _migrate_legacy_list(path)
+        data = get_db_reference(path).get() or {}
+    return data
+
+
+def _migrate_legacy_list(path: str) -> list:
+    """Rewrite a node that mixes old list indexes with push keys as keyed children only."""
+    data = get_db_reference(path).get() or {}
+    if isinstance(data, list):
+        data = {str(i): v for i, v in enumerate(data) if v is not None}
+    legacy = sorted((k for k in data if k.isdigit()), key=int)
+    # "-000…" keys sort before any push key, so old items stay oldest
+    keyed = {f"-{i:019d}": data[k] for i, k in enumerate(legacy)}
+    keyed.update({k: v for k, v in data.items() if not k.isdigit()})
+    write_paths({path: keyed})
+    return list(keyed)
@@ -1,12 +1,16 @@
-from groq import Groq
-from firebase_config import get_db_reference
+from llm import chat_completion
+from firebase_config import get_db_reference, write_paths, bootstrap_path
+from db_cache import cached_get, cache_put
+from aggregates import record_goals, goal_state
 from datetime import datetime, timedelta
-import os
-from dotenv import load_dotenv
+import hashlib
 
-load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY", ))
-MODEL = "llama-3.3-70b-versatile"
+
+def _store_goals(user_id: str, goals: list):
+    """Write the whole goals list with its bootstrap summary (active goals, no check-in history)."""
+    write_paths({f"goals/{user_id}": goals, bootstrap_path(user_id, "goals"): goal_state(goals)})
+    cache_put(user_id, f"goals/{user_id}", goals)
+    record_goals(user_id, goals)
 
 
 def save_goal(user_id: str, goal_text: str):
@@ -20,11 +24,11 @@ def save_goal(user_id: str, goal_text: str):
         "completed": False,
         "streak": 0
     })
-    ref.set(existing)
+    _store_goals(user_id, existing)
 
 
 def load_goals(user_id: str) -> list:
-    return get_db_reference(f"goals/{user_id}").get() or []
+    return cached_get(user_id, f"goals/{user_id}") or []
 
 
 def checkin_goal(user_id: str, goal_index: int, status: str):
@@ -45,7 +49,7 @@ def checkin_goal(user_id: str, goal_index: int, status: str):
         goals[goal_index]["streak"] = goals[goal_index].get("streak", 0) + 1
     elif status == "missed":
         goals[goal_index]["streak"] = 0
-    ref.set(goals)
+    _store_goals(user_id, goals)
 
 
 def complete_goal(user_id: str, goal_index: int):
@@ -53,7 +57,7 @@ def complete_goal(user_id: str, goal_index: int):
     goals = ref.get() or []
     if goal_index < len(goals):
         goals[goal_index]["completed"] = True
-        ref.set(goals)
+        _store_goals(user_id, goals)
 
 
 def delete_goal(user_id: str, goal_index: int):
@@ -61,7 +65,7 @@ def delete_goal(user_id: str, goal_index: int):
     goals = ref.get() or []
     if goal_index < len(goals):
         goals.pop(goal_index)
-        ref.set(goals)
+        _store_goals(user_id, goals)
 
 
 def generate_goal_encouragement(goal: dict, user_name: str) -> str:
@@ -69,8 +73,8 @@ def generate_goal_encouragement(goal: dict, user_name: str) -> str:
     checkins = goal.get("checkins", [])
     done = sum(1 for c in checkins if c["status"] == "done")
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        return chat_completion(
+            "goals.encouragement",
             messages=[
                 {
                     "role": "system",
@@ -83,16 +87,51 @@ def generate_goal_encouragement(goal: dict, user_name: str) -> str:
             ],
             max_tokens=80, temperature=0.75
         )
-        return response.choices[0].message.content.strip()
     except:
-        return f"Keep going, {user_name}! Every small step counts. 💙"
+        return _fallback_encouragement(user_name)
+
+
+def _fallback_encouragement(user_name: str) -> str:
+    return f"Keep going, {user_name}! Every small step counts. 💙"
+
+
+def _encouragement_key(goal: dict) -> str:
+    """Fingerprint of everything the encouragement prompt depends on."""
+    checkins = goal.get("checkins", [])
+    done = sum(1 for c in checkins if c["status"] == "done")
+    state = f"{goal['goal']}|{goal.get('streak', 0)}|{done}|{len(checkins)}"
+    return hashlib.sha1(state.encode("utf-8")).hexdigest()[:16]
+
+
+def get_goal_encouragement(user_id: str, goal_index: int, goal: dict, user_name: str) -> str:
+    """
+    Memoized generate_goal_encouragement. The result is stored on the goal
+    under "encouragement" with the state key it was generated for, so Groq
+    is only called again after a check-in changes that state.
+    """
+    key = _encouragement_key(goal)
+    memo = goal.get("encouragement") or {}
+    if memo.get("key") == key:
+        return memo["text"]
+
+    text = generate_goal_encouragement(goal, user_name)
+    if text == _fallback_encouragement(user_name):
+        return text  # don't pin a failed call
+
+    memo = {"key": key, "text": text}
+    write_paths({f"goals/{user_id}/{goal_index}/encouragement": memo})
+    goals = cached_get(user_id, f"goals/{user_id}") or []
+    if goal_index < len(goals):
+        goals[goal_index]["encouragement"] = memo
+        cache_put(user_id, f"goals/{user_id}", goals)
+    return text
 
 
 def suggest_goal(user_name: str, memory_bullets: list, age: int) -> str:
     memory = "\n".join(memory_bullets[-5:]) if memory_bullets else "No memories yet."
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        return chat_completion(
+            "goals.suggest",
             messages=[
                 {
                     "role": "system",
@@ -102,6 +141,5 @@ def suggest_goal(user_name: str, memory_bullets: list, age: int) -> str:
             ],
             max_tokens=40, temperature=0.8
         )
-        return response.choices[0].message.content.strip()
     except:
         return "Talk to one person I trust this week"
\ No newline at end of file
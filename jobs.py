@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from firebase_config import get_db_reference
+from db_cache import invalidate
+from tracing import job_trace
+from search_index import drop_session_index
+
+from brain import generate_memory_summary
+from memory import save_memory_summary, load_memory_bullets
+from journal import analyse_journal_entry, save_journal_entry
+from aggregates import load_aggregates
+from mood_analytics import load_mood_history
+from mental_profile import (
+    generate_mental_profile, save_profile_snapshot, load_profile_snapshot, profile_is_current
+)
+
+JOB_WORKERS     = int(os.getenv("JOB_WORKERS", "4"))
+JOB_STALE_AFTER = 300   # seconds before a pending record with no live worker is ignored
+SUMMARY_MIN_MESSAGES = 4  # shorter chats aren't worth a memory summary
+
+# Cached paths each job type rewrites; dropped from the session cache once it finishes
+JOB_PATHS = {
+    "memory_summary":   ["memory/{uid}/summaries", "bootstrap/{uid}/memory"],
+    "mental_profile":   ["mental_profile/{uid}"],
+    "journal_analysis": ["journal/{uid}"],
+}
+# Search indexes each job type adds to; the session copy is reloaded after it finishes
+JOB_INDEXES = {
+    "journal_analysis": "journal",
+    "memory_summary":   "memory",
+}
+
+# Process-wide: survives reruns and is shared by every session
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="jobs")
+_running = {}
+_lock = threading.Lock()
+
+
+# ─────────────────────────────────────────────
+#  EXECUTOR
+# ─────────────────────────────────────────────
+
+def _record_ref(user_id: str, job_type: str):
+    return get_db_reference(f"jobs/{user_id}/{job_type}")
+
+
+def _run(user_id: str, job_type: str, fn, args: tuple):
+    ref = _record_ref(user_id, job_type)
+    ref.update({"status": "running", "started_at": time.time()})
+    try:
+        with job_trace(user_id, job_type):
+            fn(*args)
+        ref.update({"status": "done", "finished_at": time.time(), "error": None})
+    except Exception as e:
+        print(f"[JOB ERROR] {job_type} for {user_id}: {e}")
+        ref.update({"status": "failed", "finished_at": time.time(), "error": str(e)})
+    finally:
+        with _lock:
+            _running.pop((user_id, job_type), None)
+
+
+def submit_job(user_id: str, job_type: str, fn, *args) -> bool:
+    """
+    Run fn(*args) on the background pool and keep a record at
+    jobs/{uid}/{job_type}. Returns False without queuing if the same job
+    type is already pending for this user.
+    """
+    key = (user_id, job_type)
+    # reserve the slot with a token until the future exists; the record
+    # round trips happen outside the lock so other sessions aren't held up
+    token = object()
+    with _lock:
+        if key in _running:
+            return False
+        _running[key] = token
+    try:
+        record = _record_ref(user_id, job_type).get() or {}
+        if _is_live(record):
+            with _lock:
+                _running.pop(key, None)
+            return False  # queued by another process
+        _record_ref(user_id, job_type).set({"status": "pending", "submitted_at": time.time()})
+    except Exception:
+        with _lock:
+            _running.pop(key, None)
+        raise
+    future = _executor.submit(_run, user_id, job_type, fn, args)
+    with _lock:
+        # _run may already have finished and released the slot
+        if _running.get(key) is token:
+            _running[key] = future
+    return True
+
+
+def _is_live(record: dict) -> bool:
+    return (record.get("status") in ("pending", "running")
+            and time.time() - record.get("submitted_at", 0) < JOB_STALE_AFTER)
+
+
+def job_status(user_id: str, job_type: str) -> str:
+    """'pending' while queued or running here or elsewhere, else the last outcome ('done', 'failed' or '')."""
+    if (user_id, job_type) in _running:
+        return "pending"
+    record = _record_ref(user_id, job_type).get() or {}
+    if _is_live(record):
+        return "pending"
+    return record.get("status", "") if record.get("status") in ("done", "failed") else ""
+
+
+def _watched() -> set:
+    """Job types this session queued and hasn't seen finish yet."""
+    return st.session_state.setdefault("_jobs_watched", set())
+
+
+def is_pending(job_type: str) -> bool:
+    return job_type in _watched()
+
+
+def sync_finished_jobs(user_id: str) -> list:
+    """
+    Call once per rerun. For jobs this session queued that have finished,
+    drop the cached paths they rewrote so the next read sees the result.
+    Returns the job types that completed successfully.
+    """
+    finished = []
+    for job_type in list(_watched()):
+        status = job_status(user_id, job_type)
+        if status == "pending":
+            continue
+        for path in JOB_PATHS[job_type]:
+            invalidate(user_id, path.format(uid=user_id))
+        if job_type in JOB_INDEXES:
+            drop_session_index(JOB_INDEXES[job_type])
+        _watched().discard(job_type)
+        if status == "done":
+            finished.append(job_type)
+    return finished
+
+
+# ─────────────────────────────────────────────
+#  JOBS
+# ─────────────────────────────────────────────
+
+def _summarise_chat(user_id: str, chat: list):
+    summary = generate_memory_summary(chat)
+    if summary:
+        save_memory_summary(user_id, summary)
+
+
+def _refresh_profile(user_id: str, user_name: str, age: int):
+    aggregates = load_aggregates(user_id)
+    if profile_is_current(load_profile_snapshot(user_id), aggregates):
+        return  # nothing material changed since generated_at — skip the LLM call
+    profile = generate_mental_profile(user_name, age, aggregates, load_memory_bullets(user_id),
+                                      load_mood_history(user_id))
+    save_profile_snapshot(user_id, profile)
+
+
+def _analyse_journal(user_id: str, entry: str, user_name: str):
+    analysis = analyse_journal_entry(entry, user_name)
+    save_journal_entry(user_id, entry, analysis)
+
+
+def _queue(user_id: str, job_type: str, fn, *args) -> bool:
+    queued = submit_job(user_id, job_type, fn, *args)
+    if queued:
+        _watched().add(job_type)
+    return queued
+
+
+def queue_memory_summary(user_id: str, chat: list) -> bool:
+    if len(chat) < SUMMARY_MIN_MESSAGES:
+        return False
+    return _queue(user_id, "memory_summary", _summarise_chat, user_id, list(chat))
+
+
+def queue_profile_refresh(user_id: str, user_name: str, age: int) -> bool:
+    return _queue(user_id, "mental_profile", _refresh_profile, user_id, user_name, age)
+
+
+def queue_journal_analysis(user_id: str, entry: str, user_name: str) -> bool:
+    return _queue(user_id, "journal_analysis", _analyse_journal, user_id, entry, user_name)
@@ -1,37 +1,40 @@
-from groq import Groq
-from firebase_config import get_db_reference
+from llm import chat_completion
+from firebase_config import as_list, append_capped
+from db_cache import cached_get, cache_patch, peek
+from aggregates import record_journal_entry
+from archive import archiver, ARCHIVE_BATCH
+from search_index import index_document
 from datetime import datetime
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-MODEL = "llama-3.3-70b-versatile"
 
 
 def save_journal_entry(user_id: str, entry: str, analysis: dict):
-    ref = get_db_reference(f"journal/{user_id}")
-    existing = ref.get() or []
-    existing.append({
-        "date": datetime.now().strftime("%d %b %Y, %H:%M"),
+    path = f"journal/{user_id}"
+    date = datetime.now().strftime("%d %b %Y, %H:%M")
+    found, held = peek(user_id, path)
+    added, dropped = append_capped(path, [{
+        "date": date,
         "entry": entry,
         "dominant_emotion": analysis.get("emotion", "neutral"),
         "patterns": analysis.get("patterns", ""),
         "reflection": analysis.get("reflection", ""),
         "encouragement": analysis.get("encouragement", ""),
-    })
-    existing = existing[-30:]
-    ref.set(existing)
+    }], cap=30, slack=ARCHIVE_BATCH, on_trim=archiver(user_id, "journal"),
+        held=(held or {}) if found else None)
+    cache_patch(user_id, path, added, dropped)
+    record_journal_entry(user_id, analysis.get("emotion", "neutral"), entry)
+    for key in added:
+        index_document(user_id, "journal", key, entry,
+                       {"date": date, "emotion": analysis.get("emotion", "neutral")})
 
 
 def load_journal_entries(user_id: str) -> list:
-    return get_db_reference(f"journal/{user_id}").get() or []
+    return as_list(cached_get(user_id, f"journal/{user_id}"))
 
 
 def analyse_journal_entry(entry: str, user_name: str) -> dict:
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        text = chat_completion(
+            "journal.analyse",
             messages=[
                 {
                     "role": "system",
@@ -48,7 +51,6 @@ def analyse_journal_entry(entry: str, user_name: str) -> dict:
             ],
             max_tokens=200, temperature=0.6
         )
-        text = response.choices[0].message.content.strip()
         result = {}
         for line in text.split("\n"):
             for key in ["EMOTION", "PATTERN", "REFLECTION", "ENCOURAGEMENT"]:
@@ -0,0 +1,208 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+import httpx
+from groq import Groq, APIStatusError, APIConnectionError
+from dotenv import load_dotenv
+from tracing import span, register_metrics
+
+load_dotenv()
+
+MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+LLM_TIMEOUT         = float(os.getenv("LLM_TIMEOUT", "20"))
+LLM_MAX_RETRIES     = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_BACKOFF_BASE    = 0.5
+LLM_BACKOFF_CAP     = 8.0
+
+
+# ─────────────────────────────────────────────
+#  POOLED CLIENT
+#  One keep-alive connection pool for the whole process. Retries are done
+#  here (with jitter) instead of inside the SDK, so max_retries=0.
+# ─────────────────────────────────────────────
+
+_http = httpx.Client(
+    limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY * 2,
+                        max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                        keepalive_expiry=60),
+    timeout=LLM_TIMEOUT,
+)
+client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=_http,
+              max_retries=0, timeout=LLM_TIMEOUT)
+
+# Caps in-flight Groq calls across every Streamlit session in this process
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+def set_client(new_client):
+    """Swap the Groq client (e.g. for a fake in benchmarks)."""
+    global client
+    client = new_client
+
+
+# ─────────────────────────────────────────────
+#  METRICS
+# ─────────────────────────────────────────────
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(call_site: str, seconds: float, ok: bool, retries: int):
+    with _metrics_lock:
+        m = _metrics.setdefault(call_site, {
+            "calls": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=1000)
+        })
+        m["calls"] += 1
+        m["errors"] += 0 if ok else 1
+        m["retries"] += retries
+        m["latencies"].append(seconds)
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def get_metrics() -> dict:
+    """Per-call-site counts and latency percentiles (seconds)."""
+    with _metrics_lock:
+        snapshot = {site: dict(m, latencies=list(m["latencies"])) for site, m in _metrics.items()}
+    return {
+        site: {
+            "calls": m["calls"], "errors": m["errors"], "retries": m["retries"],
+            "p50": round(_percentile(m["latencies"], 0.50), 3),
+            "p95": round(_percentile(m["latencies"], 0.95), 3),
+            "max": round(max(m["latencies"], default=0.0), 3),
+        }
+        for site, m in snapshot.items()
+    }
+
+
+def _metric_samples(metrics: dict) -> list:
+    samples = []
+    for site, m in metrics.items():
+        labels = {"site": site}
+        samples += [
+            ("mindmate_llm_calls_total", labels, m["calls"], "counter"),
+            ("mindmate_llm_errors_total", labels, m["errors"], "counter"),
+            ("mindmate_llm_retries_total", labels, m["retries"], "counter"),
+            ("mindmate_llm_latency_seconds", dict(labels, quantile="0.5"), m["p50"], "gauge"),
+            ("mindmate_llm_latency_seconds", dict(labels, quantile="0.95"), m["p95"], "gauge"),
+        ]
+    return samples
+
+
+register_metrics("llm", get_metrics, _metric_samples)
+
+
+# ─────────────────────────────────────────────
+#  RETRY POLICY
+# ─────────────────────────────────────────────
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(e, APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return False
+
+
+def _backoff(attempt: int, e: Exception) -> float:
+    retry_after = None
+    if isinstance(e, APIStatusError):
+        retry_after = e.response.headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_BACKOFF_CAP)
+        except ValueError:
+            pass
+    # full jitter
+    return random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+def _acquire(timeout: float):
+    if not _slots.acquire(timeout=timeout):
+        raise TimeoutError(f"LLM concurrency limit ({LLM_MAX_CONCURRENCY}) busy for {timeout}s")
+
+
+# ─────────────────────────────────────────────
+#  CALLS
+# ─────────────────────────────────────────────
+
+def chat_completion(call_site: str, messages: list, max_tokens: int,
+                    temperature: float, timeout: float = None, **kwargs) -> str:
+    """
+    Blocking completion through the shared client. Returns the stripped
+    message text; raises the last error once retries are exhausted, so
+    callers keep their own fallbacks.
+    """
+    with span("llm.chat", call_site):
+        return _chat_completion(call_site, messages, max_tokens, temperature, timeout, **kwargs)
+
+
+def _chat_completion(call_site, messages, max_tokens, temperature, timeout, **kwargs) -> str:
+    timeout = timeout or LLM_TIMEOUT
+    start, attempt = time.perf_counter(), 0
+    while True:
+        _acquire(timeout)
+        try:
+            response = client.chat.completions.create(
+                model=MODEL, messages=messages, max_tokens=max_tokens,
+                temperature=temperature, timeout=timeout, **kwargs
+            )
+            _record(call_site, time.perf_counter() - start, True, attempt)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                _record(call_site, time.perf_counter() - start, False, attempt)
+                raise
+            delay = _backoff(attempt, e)
+        finally:
+            _slots.release()
+        attempt += 1
+        time.sleep(delay)
+
+
+def stream_completion(call_site: str, messages: list, max_tokens: int,
+                      temperature: float, timeout: float = None, **kwargs):
+    """
+    Streaming completion: yields text chunks. Retries only before the first
+    chunk arrives; a concurrency slot is held until the stream is consumed.
+    """
+    with span("llm.stream", call_site):
+        yield from _stream_completion(call_site, messages, max_tokens, temperature, timeout, **kwargs)
+
+
+def _stream_completion(call_site, messages, max_tokens, temperature, timeout, **kwargs):
+    timeout = timeout or LLM_TIMEOUT
+    start, attempt, started = time.perf_counter(), 0, False
+    while True:
+        _acquire(timeout)
+        try:
+            stream = client.chat.completions.create(
+                model=MODEL, messages=messages, max_tokens=max_tokens,
+                temperature=temperature, timeout=timeout, stream=True, **kwargs
+            )
+            for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    started = True
+                    yield token
+            _record(call_site, time.perf_counter() - start, True, attempt)
+            return
+        except Exception as e:
+            if started or attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                _record(call_site, time.perf_counter() - start, False, attempt)
+                raise
+            delay = _backoff(attempt, e)
+        finally:
+            _slots.release()
+        attempt += 1
+        time.sleep(delay)
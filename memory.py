@@ -1,4 +1,13 @@
-from firebase_config import get_db_reference
+from firebase_config import (
+    get_db_reference, new_push_key, as_list, append_capped, load_keyed, write_paths, bootstrap_path,
+    _migrate_legacy_list,
+)
+from db_cache import cached_get, cache_put, cache_patch, invalidate
+from archive import archiver, archive_items, ARCHIVE_BATCH
+from search_index import search, index_document, remove_documents, terms
+from storage import push_key_time
+import re
+import time
 from datetime import datetime
 
 
@@ -6,22 +15,135 @@ from datetime import datetime
 #  CHAT HISTORY
 # ─────────────────────────────────────────────
 
+CHAT_PAGE_SIZE = 30
+
+
 def load_chat_history(user_id: str) -> list:
-    ref = get_db_reference(f"chats/{user_id}")
-    data = ref.get()
-    return data if data else []
+    return as_list(cached_get(user_id, f"chats/{user_id}"))
+
+
+def save_chat_turn(user_id: str, messages: list, emotion: str) -> list:
+    """
+    Store a turn's messages as keyed children, O(1) each, together with the
+    user's mood in one multi-path write. Returns the message keys.
+    """
+    added = {new_push_key(): message for message in messages}
+    save_mood(user_id, emotion, also={f"chats/{user_id}/{k}": m for k, m in added.items()})
+    cache_patch(user_id, f"chats/{user_id}", added)
+    return list(added)
+
 
+def load_chat_page(user_id: str, limit: int = CHAT_PAGE_SIZE, before: str = None) -> tuple:
+    """
+    Latest `limit` messages older than key `before` (or the newest page when
+    None), oldest first. Returns (messages, cursor); pass cursor back as
+    `before` to get the next older page. cursor is None when there is no more.
+    """
+    query = get_db_reference(f"chats/{user_id}").order_by_key()
+    if before:
+        query = query.end_at(before)
+    # one extra row tells us whether an older page exists (+1 for `before` itself)
+    data = query.limit_to_last(limit + (2 if before else 1)).get()
 
-def save_chat_history(user_id: str, chat: list):
-    get_db_reference(f"chats/{user_id}").set(chat)
+    # a chat saved as one list (old layout) comes back as a list or as
+    # "0".."N" keys depending on the backend; either way, key it once
+    if isinstance(data, list) or any(k.isdigit() for k in data or {}):
+        _migrate_legacy_list(f"chats/{user_id}")
+        invalidate(user_id, f"chats/{user_id}")
+        return load_chat_page(user_id, limit, before)
+
+    data = data or {}
+    keys = sorted(data)
+    if before and keys and keys[-1] == before:
+        keys.pop()
+    has_more = len(keys) > limit
+    keys = keys[-limit:]
+    return [data[k] for k in keys], (keys[0] if has_more else None)
+
+
+def clear_chat_history(user_id: str):
+    get_db_reference(f"chats/{user_id}").delete()
+    invalidate(user_id, f"chats/{user_id}")
 
 
 # ─────────────────────────────────────────────
 #  LONG-TERM MEMORY
 # ─────────────────────────────────────────────
 
-def load_long_term_memory(user_id: str) -> str:
-    summaries = get_db_reference(f"memory/{user_id}/summaries").get()
+MEMORY_TOP_K          = 6     # bullets injected per turn
+MEMORY_CAP            = 20    # bullets kept in the hot node; the rest are archived
+MEMORY_HALF_LIFE_DAYS = 14    # recency decay of a bullet's weight
+MEMORY_DUPLICATE      = 0.75  # shingle overlap (both ways) at which two bullets are the same fact
+
+
+def _bullet(key: str, item) -> dict:
+    """Bullets saved before consolidation are plain strings."""
+    if isinstance(item, dict):
+        return item
+    seen = push_key_time(key) if not key.startswith("-000") else 0
+    return {"text": item, "count": 1, "first_seen": seen, "last_seen": seen}
+
+
+def _weight(bullet: dict, now: float) -> float:
+    """Times the fact was summarised, halved every MEMORY_HALF_LIFE_DAYS since it was last seen."""
+    age_days = max(now - bullet.get("last_seen", 0), 0) / 86400
+    return bullet.get("count", 1) * 0.5 ** (age_days / MEMORY_HALF_LIFE_DAYS)
+
+
+_NEGATION_RE = re.compile(r"\b(?:no|not|never|nor|without|cannot|\w+n[’']t)\b")
+
+
+def _shingles(text: str) -> set:
+    """
+    Stemmed content words ("Feels stressed about exams" → {feel, stress, exam}),
+    plus "not" when the line is negated: terms() drops negators as
+    stopwords, which would make "Not sleeping well" equal "Sleeping well".
+    """
+    shingles = set(terms(text))
+    if _NEGATION_RE.search(text.casefold()):
+        shingles.add("not")
+    return shingles
+
+
+def _similarity(a: set, b: set) -> float:
+    """
+    Shared shingles over the larger set, so both lines must cover most of
+    each other: "Fighting with mother" isn't the same fact as "Made up with
+    mother after fighting". Lines of opposite polarity never match.
+    """
+    if not a or not b or ("not" in a) != ("not" in b):
+        return 0.0
+    return len(a & b) / max(len(a), len(b))
+
+
+def _bullets(stored) -> dict:
+    """{key: bullet dict} from the summaries node, in either layout."""
+    stored = stored or {}
+    items = stored.items() if isinstance(stored, dict) else ((f"-{i:019d}", b) for i, b in enumerate(stored) if b)
+    return {k: _bullet(k, v) for k, v in items}
+
+
+def _ranked(bullets: dict, now: float) -> list:
+    return [b["text"] for b in sorted(bullets.values(), key=lambda b: -_weight(b, now))]
+
+
+def top_memory(stored) -> list:
+    """The MEMORY_TOP_K highest-weight bullet texts — the bootstrap projection of the summaries node."""
+    return _ranked(_bullets(stored), time.time())[:MEMORY_TOP_K]
+
+
+def load_long_term_memory(user_id: str, query: str = "") -> str:
+    """
+    The MEMORY_TOP_K bullets most relevant to `query` (the current message
+    and recent turns), topped up with the highest-weight bullets. Without a
+    query, just the highest-weight ones.
+    """
+    bullets = _bullets(cached_get(user_id, f"memory/{user_id}/summaries"))
+    ranked = _ranked(bullets, time.time())
+    # only bullets still in the hot node: an evicted one may linger in an older index
+    hits = search(user_id, "memory", query, k=MEMORY_TOP_K) if query else []
+    relevant = [bullets[key]["text"] for key, _, _ in hits if key in bullets]
+    summaries = list(dict.fromkeys(relevant + ranked))[:MEMORY_TOP_K]
     if not summaries:
         return ""
     lines = "\n".join(f"• {s}" for s in summaries)
@@ -29,40 +151,107 @@ def load_long_term_memory(user_id: str) -> str:
 
 
 def load_memory_bullets(user_id: str) -> list:
-    return get_db_reference(f"memory/{user_id}/summaries").get() or []
+    return [b["text"] if isinstance(b, dict) else b
+            for b in as_list(cached_get(user_id, f"memory/{user_id}/summaries"))]
+
+
+def load_top_memory(user_id: str) -> list:
+    """top_memory() as kept in bootstrap/{uid}, without reading the summaries node."""
+    return cached_get(user_id, bootstrap_path(user_id, "memory")) or []
 
 
 def save_memory_summary(user_id: str, summary: str):
-    ref = get_db_reference(f"memory/{user_id}/summaries")
-    existing = ref.get() or []
-    new_items = [
-        line.strip("•- ").strip()
-        for line in summary.split("\n")
-        if line.strip()
-    ]
-    existing.extend(new_items)
-    existing = existing[-20:]
-    ref.set(existing)
+    """
+    Consolidate a new summary into the stored bullets. A line that repeats a
+    stored fact (shingle similarity >= MEMORY_DUPLICATE) bumps that bullet's
+    count and recency and takes the newer wording, instead of adding a copy.
+    Past MEMORY_CAP, the lowest-weight bullets are archived rather than the
+    oldest.
+    """
+    path = f"memory/{user_id}/summaries"
+    now  = time.time()
+    bullets = {k: _bullet(k, v) for k, v in load_keyed(path).items()}
+    shingles = {k: _shingles(b["text"]) for k, b in bullets.items()}
+
+    changes, added, reworded = {}, {}, {}
+    for line in summary.split("\n"):
+        text = line.strip("•- ").strip()
+        if not text:
+            continue
+        sh = _shingles(text)
+        match = max(shingles, key=lambda k: _similarity(sh, shingles[k]), default=None)
+        if match is not None and _similarity(sh, shingles[match]) >= MEMORY_DUPLICATE:
+            bullet = bullets[match]
+            if bullet["text"] != text and match not in added:
+                reworded.setdefault(match, bullet["text"])
+            bullet["text"] = text
+            bullet["count"] = bullet.get("count", 1) + 1
+            bullet["last_seen"] = now
+            changes[match] = bullet
+            shingles[match] = sh
+            continue
+        key = new_push_key()
+        bullets[key] = changes[key] = added[key] = {"text": text, "count": 1, "first_seen": now, "last_seen": now}
+        shingles[key] = sh
+
+    evicted = {}
+    if len(bullets) > MEMORY_CAP:
+        by_weight = sorted(bullets, key=lambda k: (_weight(bullets[k], now), k))
+        evicted = {k: bullets.pop(k) for k in by_weight[:len(bullets) - MEMORY_CAP]}
+        archive_items(user_id, "memory", evicted)
+        # archived facts must stop surfacing through search too
+        remove_documents(user_id, "memory", {k: reworded.get(k, b["text"]) for k, b in evicted.items() if k not in added})
+    changes.update({k: None for k in evicted})
+    top = top_memory(bullets)
+    if changes:
+        write_paths({**{f"{path}/{k}": v for k, v in changes.items()}, bootstrap_path(user_id, "memory"): top})
+    cache_put(user_id, path, bullets)
+    cache_put(user_id, bootstrap_path(user_id, "memory"), top)
+    reindex = {k: old for k, old in reworded.items() if k not in evicted}
+    remove_documents(user_id, "memory", reindex)
+    for key in list(added) + list(reindex):
+        if key not in evicted:
+            index_document(user_id, "memory", key, bullets[key]["text"], {})
 
 
 # ─────────────────────────────────────────────
 #  MOOD TRACKING
 # ─────────────────────────────────────────────
 
-def save_mood(user_id: str, emotion: str):
-    ref = get_db_reference(f"moods/{user_id}")
-    existing = ref.get() or []
-    existing.append({
+MOOD_CAP        = 30    # moods kept in the hot node; the rest are archived
+BOOTSTRAP_MOODS = 30    # latest moods kept in bootstrap/{uid} for the sidebar timeline and trend
+
+
+def latest_moods(stored) -> list:
+    """The BOOTSTRAP_MOODS newest moods, oldest first — the bootstrap projection of the moods node."""
+    return as_list(stored)[-BOOTSTRAP_MOODS:]
+
+
+def save_mood(user_id: str, emotion: str, also: dict = None):
+    """Append a mood; `also` is more {path: value} changes to write in the same update."""
+    path = f"moods/{user_id}"
+    held = cached_get(user_id, path) or {}
+    mood = {
         "emotion": emotion,
+        "ts": int(time.time()),
         "date": datetime.now().strftime("%d %b %Y"),
         "time": datetime.now().strftime("%H:%M")
-    })
-    existing = existing[-30:]
-    ref.set(existing)
+    }
+    recent = latest_moods(as_list(held) + [mood])
+    added, dropped = append_capped(path, [mood], cap=MOOD_CAP, slack=ARCHIVE_BATCH,
+                                   on_trim=archiver(user_id, "moods"), held=held,
+                                   also={**(also or {}), bootstrap_path(user_id, "moods"): recent})
+    cache_patch(user_id, path, added, dropped)
+    cache_put(user_id, bootstrap_path(user_id, "moods"), recent)
 
 
 def load_moods(user_id: str) -> list:
-    return get_db_reference(f"moods/{user_id}").get() or []
+    return as_list(cached_get(user_id, f"moods/{user_id}"))
+
+
+def load_recent_moods(user_id: str) -> list:
+    """latest_moods() as kept in bootstrap/{uid}, without reading the moods node."""
+    return as_list(cached_get(user_id, bootstrap_path(user_id, "moods")))
 
 
 # ─────────────────────────────────────────────
@@ -70,13 +259,13 @@ def load_moods(user_id: str) -> list:
 # ─────────────────────────────────────────────
 
 def update_last_seen(user_id: str):
-    get_db_reference(f"users/{user_id}/last_seen").set(
-        datetime.now().strftime("%Y-%m-%d")
-    )
+    today = datetime.now().strftime("%Y-%m-%d")
+    write_paths({f"users/{user_id}/last_seen": today})
+    cache_put(user_id, f"users/{user_id}/last_seen", today)
 
 
 def get_days_since_last_visit(user_id: str) -> int:
-    last_seen = get_db_reference(f"users/{user_id}/last_seen").get()
+    last_seen = cached_get(user_id, f"users/{user_id}/last_seen")
     if not last_seen:
         return 0
     try:
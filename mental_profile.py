@@ -1,24 +1,51 @@
-from groq import Groq
-from firebase_config import get_db_reference
+from llm import chat_completion
+from firebase_config import write_paths
+from db_cache import cached_get, cache_put
+from aggregates import signature
+from mood_analytics import describe
 from datetime import datetime
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY", ))
-MODEL = "llama-3.3-70b-versatile"
 
+def describe_aggregates(agg: dict) -> str:
+    """Prompt text for the aggregates document."""
+    moods = agg.get("moods") or {}
+    total = sum(moods.values())
+    if total:
+        shares = sorted(moods.items(), key=lambda kv: -kv[1])
+        mood_text = ", ".join(f"{e} {round(100 * c / total)}%" for e, c in shares) + f" (n={total})"
+        mood_text += "\nRecent: " + " → ".join(agg.get("recent_moods") or [])
+    else:
+        mood_text = "No mood data yet"
+    shifts = sorted((agg.get("transitions") or {}).items(), key=lambda kv: -kv[1])[:3]
+    shift_text = ", ".join(f"{s.replace('>', '→')} ×{c}" for s, c in shifts) or "None yet"
+    themes = sorted((agg.get("journal_themes") or {}).items(), key=lambda kv: -kv[1])
+    theme_text = ", ".join(f"{e} ×{c}" for e, c in themes) or "No journal entries"
+    journal_text = "\n".join(agg.get("recent_journal") or []) or "No journal entries"
+    goals = (agg.get("goals") or {}).get("active", [])
+    goal_text = "\n".join(
+        f"{g['goal']} (streak {g['streak']}, done {g['done']}/{g['checkins']})" for g in goals
+    ) or "No active goals"
+    return (
+        f"Moods: {mood_text}\n"
+        f"Common mood shifts: {shift_text}\n"
+        f"Journal themes: {theme_text}\n"
+        f"Goals:\n{goal_text}\n"
+        f"Journal snippets:\n{journal_text}"
+    )
 
-def generate_mental_profile(user_name: str, age: int, memory_bullets: list,
-                              moods: list, journal_entries: list, goals: list) -> dict:
-    mood_list   = ", ".join([m["emotion"] for m in moods[-20:]]) if moods else "No mood data yet"
+
+def profile_is_current(profile: dict, agg: dict) -> bool:
+    """True when the saved profile was generated from materially the same aggregates."""
+    return bool(profile) and profile.get("basis") == signature(agg)
+
+
+def generate_mental_profile(user_name: str, age: int, aggregates: dict, memory_bullets: list,
+                            mood_series=None) -> dict:
     memory_text = "\n".join(memory_bullets[-10:]) if memory_bullets else "No memories yet"
-    goal_list   = "\n".join([g["goal"] for g in goals if not g.get("completed")]) if goals else "No active goals"
-    journal_text= "\n".join([j["entry"][:100] for j in journal_entries[-5:]]) if journal_entries else "No journal entries"
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        text = chat_completion(
+            "mental_profile.generate",
             messages=[
                 {
                     "role": "system",
@@ -36,22 +63,21 @@ def generate_mental_profile(user_name: str, age: int, memory_bullets: list,
                     "role": "user",
                     "content": (
                         f"User: {user_name}, Age: {age}\n"
-                        f"Moods: {mood_list}\n"
                         f"Memories:\n{memory_text}\n"
-                        f"Goals:\n{goal_list}\n"
-                        f"Journal snippets:\n{journal_text}"
+                        f"{describe_aggregates(aggregates)}"
+                        + (f"\nMood patterns:\n{describe(mood_series)}" if mood_series is not None else "")
                     )
                 }
             ],
             max_tokens=350, temperature=0.7
         )
-        text = response.choices[0].message.content.strip()
         result = {}
         for line in text.split("\n"):
             for key in ["TRIGGERS", "STRENGTHS", "SUPPORT_STYLE", "GROWTH", "MESSAGE"]:
                 if line.startswith(f"{key}:"):
                     result[key.lower()] = line.replace(f"{key}:", "").strip()
         result["generated_at"] = datetime.now().strftime("%d %b %Y")
+        result["basis"] = signature(aggregates)
         return result
     except Exception as e:
         print(f"[PROFILE ERROR] {e}")
@@ -66,8 +92,9 @@ def generate_mental_profile(user_name: str, age: int, memory_bullets: list,
 
 
 def save_profile_snapshot(user_id: str, profile: dict):
-    get_db_reference(f"mental_profile/{user_id}").set(profile)
+    write_paths({f"mental_profile/{user_id}": profile})
+    cache_put(user_id, f"mental_profile/{user_id}", profile)
 
 
 def load_profile_snapshot(user_id: str) -> dict:
-    return get_db_reference(f"mental_profile/{user_id}").get() or {}
\ No newline at end of file
+    return cached_get(user_id, f"mental_profile/{user_id}") or {}
\ No newline at end of file
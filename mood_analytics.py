@@ -0,0 +1,223 @@
+import time
+from datetime import datetime
+import numpy as np
+from emotion_classifier import EMOTIONS
+from memory import load_recent_moods
+from archive import load_history
+
+CODES = {e: i for i, e in enumerate(EMOTIONS)}
+N_EMOTIONS = len(EMOTIONS)
+
+# Rough pleasantness of each emotion, for trend lines (-1 … +1)
+VALENCE = np.array([{
+    "anxious": -0.6, "sad": -0.8, "angry": -0.6, "lonely": -0.7,
+    "hopeful": 0.7, "stressed": -0.5, "happy": 1.0, "neutral": 0.0,
+}[e] for e in EMOTIONS], dtype=np.float32)
+
+DAY = 86400
+DAY_PARTS = ["night", "morning", "afternoon", "evening"]   # 0-6, 6-12, 12-18, 18-24
+
+
+def _utc_offset() -> int:
+    """Local UTC offset in seconds (applied to all timestamps; DST shifts are ignored)."""
+    return time.localtime().tm_gmtoff
+
+
+# ─────────────────────────────────────────────
+#  COLUMNAR SERIES
+# ─────────────────────────────────────────────
+
+class MoodSeries:
+    """Mood history as two aligned, time-sorted columns: int64 epoch seconds and uint8 emotion codes."""
+
+    __slots__ = ("ts", "codes")
+
+    def __init__(self, ts, codes):
+        ts = np.asarray(ts, dtype=np.int64)
+        codes = np.asarray(codes, dtype=np.uint8)
+        if ts.size and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, codes = ts[order], codes[order]
+        self.ts = ts
+        self.codes = codes
+
+    def __len__(self):
+        return int(self.ts.size)
+
+    @classmethod
+    def from_moods(cls, moods: list) -> "MoodSeries":
+        """From mood dicts; entries saved before `ts` existed fall back to their date/time strings."""
+        ts = np.fromiter((_mood_ts(m) for m in moods), dtype=np.int64, count=len(moods))
+        codes = np.fromiter((CODES.get(m.get("emotion"), CODES["neutral"]) for m in moods),
+                            dtype=np.uint8, count=len(moods))
+        return cls(ts, codes)
+
+    @classmethod
+    def concat(cls, *series) -> "MoodSeries":
+        series = [s for s in series if len(s)]
+        if not series:
+            return cls([], [])
+        return cls(np.concatenate([s.ts for s in series]), np.concatenate([s.codes for s in series]))
+
+    def since(self, ts: int) -> "MoodSeries":
+        start = int(np.searchsorted(self.ts, ts, side="left"))
+        return MoodSeries(self.ts[start:], self.codes[start:])
+
+    def emotions(self, last: int = None) -> list:
+        codes = self.codes if last is None else self.codes[-last:]
+        return [EMOTIONS[c] for c in codes]
+
+
+def load_mood_series(user_id: str) -> MoodSeries:
+    """The latest moods as kept in bootstrap/{uid} — cheap enough for every rerun."""
+    return MoodSeries.from_moods(load_recent_moods(user_id))
+
+
+def load_mood_history(user_id: str) -> MoodSeries:
+    """Archive plus hot window, for analytics and the profile."""
+    return MoodSeries.from_moods(load_history(user_id, "moods"))
+
+
+def _mood_ts(mood: dict) -> int:
+    if mood.get("ts"):
+        return int(mood["ts"])
+    try:
+        stamp = datetime.strptime(f"{mood.get('date', '')} {mood.get('time', '00:00')}", "%d %b %Y %H:%M")
+        return int(stamp.timestamp())
+    except ValueError:
+        return 0
+
+
+# ─────────────────────────────────────────────
+#  HISTOGRAMS
+# ─────────────────────────────────────────────
+
+def distribution(series: MoodSeries) -> np.ndarray:
+    """Count per emotion code."""
+    return np.bincount(series.codes, minlength=N_EMOTIONS)
+
+
+def _local_days(series: MoodSeries) -> np.ndarray:
+    return (series.ts + _utc_offset()) // DAY
+
+
+def _binned(bins: np.ndarray, codes: np.ndarray) -> tuple:
+    """(unique bins, counts[len(bins), N_EMOTIONS]) in one bincount."""
+    keys, inverse = np.unique(bins, return_inverse=True)
+    flat = np.bincount(inverse * N_EMOTIONS + codes, minlength=keys.size * N_EMOTIONS)
+    return keys, flat.reshape(keys.size, N_EMOTIONS)
+
+
+def daily_histogram(series: MoodSeries) -> tuple:
+    """(day start epochs, counts[day, emotion]) for days that have moods."""
+    days, counts = _binned(_local_days(series), series.codes)
+    return days * DAY - _utc_offset(), counts
+
+
+def weekly_histogram(series: MoodSeries) -> tuple:
+    """(Monday start epochs, counts[week, emotion]). Epoch day 0 was a Thursday."""
+    weeks, counts = _binned((_local_days(series) + 3) // 7, series.codes)
+    return (weeks * 7 - 3) * DAY - _utc_offset(), counts
+
+
+def time_of_day(series: MoodSeries) -> np.ndarray:
+    """counts[part, emotion] for the DAY_PARTS quarters of the local day."""
+    hours = ((series.ts + _utc_offset()) % DAY) // 3600
+    parts = hours // 6
+    flat = np.bincount(parts * N_EMOTIONS + series.codes, minlength=len(DAY_PARTS) * N_EMOTIONS)
+    return flat.reshape(len(DAY_PARTS), N_EMOTIONS)
+
+
+def transition_matrix(series: MoodSeries, normalize: bool = True) -> np.ndarray:
+    """[from, to] counts of consecutive moods; rows sum to 1 when normalized."""
+    codes = series.codes.astype(np.int64)
+    flat = np.bincount(codes[:-1] * N_EMOTIONS + codes[1:], minlength=N_EMOTIONS * N_EMOTIONS)
+    matrix = flat.reshape(N_EMOTIONS, N_EMOTIONS).astype(np.float64)
+    if normalize:
+        rows = matrix.sum(axis=1, keepdims=True)
+        np.divide(matrix, rows, out=matrix, where=rows > 0)
+    return matrix
+
+
+# ─────────────────────────────────────────────
+#  TRENDS
+# ─────────────────────────────────────────────
+
+def rolling_trend(series: MoodSeries, window_days: int = 7) -> tuple:
+    """
+    (day start epochs, rolling mean valence) over a continuous day range.
+    Days without moods contribute nothing rather than counting as neutral.
+    """
+    if not len(series):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    days = _local_days(series)
+    first = days[0]
+    index = days - first
+    span = int(index[-1]) + 1
+    sums = np.bincount(index, weights=VALENCE[series.codes], minlength=span)
+    counts = np.bincount(index, minlength=span).astype(np.float64)
+    kernel = np.ones(window_days)
+    rolled_sums = np.convolve(sums, kernel)[:span]
+    rolled_counts = np.convolve(counts, kernel)[:span]
+    trend = np.divide(rolled_sums, rolled_counts, out=np.full(span, np.nan), where=rolled_counts > 0)
+    return (first + np.arange(span)) * DAY - _utc_offset(), trend
+
+
+def trend_direction(series: MoodSeries, window_days: int = 7, threshold: float = 0.15) -> str:
+    """'improving', 'declining' or 'steady': this window's mean valence vs the one before."""
+    if len(series) < 2:
+        return "steady"
+    end = series.ts[-1]
+    recent = series.since(end - window_days * DAY)
+    before = series.since(end - 2 * window_days * DAY)
+    before = MoodSeries(before.ts[:len(before) - len(recent)], before.codes[:len(before) - len(recent)])
+    if not len(before):
+        return "steady"
+    delta = VALENCE[recent.codes].mean() - VALENCE[before.codes].mean()
+    if delta > threshold:
+        return "improving"
+    if delta < -threshold:
+        return "declining"
+    return "steady"
+
+
+# ─────────────────────────────────────────────
+#  SUMMARY
+# ─────────────────────────────────────────────
+
+def summarize(series: MoodSeries) -> dict:
+    """Compact figures for the sidebar and the profile."""
+    if not len(series):
+        return {}
+    counts = distribution(series)
+    top = np.argsort(counts)[::-1][:3]
+    parts = time_of_day(series)
+    by_part = {}
+    for p, name in enumerate(DAY_PARTS):
+        if parts[p].sum():
+            by_part[name] = EMOTIONS[int(np.argmax(parts[p]))]
+    matrix = transition_matrix(series, normalize=False)
+    np.fill_diagonal(matrix, 0)
+    shift = np.unravel_index(int(np.argmax(matrix)), matrix.shape) if matrix.any() else None
+    return {
+        "total": len(series),
+        "top": [(EMOTIONS[i], round(float(counts[i]) / len(series), 2)) for i in top if counts[i]],
+        "by_part": by_part,
+        "common_shift": (EMOTIONS[shift[0]], EMOTIONS[shift[1]]) if shift else None,
+        "trend": trend_direction(series),
+    }
+
+
+def describe(series: MoodSeries) -> str:
+    """One-paragraph prompt text for summarize()."""
+    s = summarize(series)
+    if not s:
+        return "No mood history yet"
+    lines = [
+        "Most frequent: " + ", ".join(f"{e} {round(share * 100)}%" for e, share in s["top"]),
+        "By time of day: " + ", ".join(f"{part} → {e}" for part, e in s["by_part"].items()),
+        f"Recent trend: {s['trend']}",
+    ]
+    if s["common_shift"]:
+        lines.append(f"Most common shift: {s['common_shift'][0]} → {s['common_shift'][1]}")
+    return "\n".join(lines)
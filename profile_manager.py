@@ -1,10 +1,9 @@
-from firebase_config import get_db_reference
+from db_cache import cached_get
 
 
 def get_user_profile(user_id: str) -> dict:
     """Fetch full user profile from Firebase."""
-    ref = get_db_reference(f"users/{user_id}")
-    data = ref.get()
+    data = cached_get(user_id, f"users/{user_id}")
     return data if data else {}
 
 
@@ -1,3 +1,121 @@
+import re
+import unicodedata
+
+# ─────────────────────────────────────────────
+#  TEXT NORMALISATION
+#  Messages and phrase lists go through the same normaliser, so evasions
+#  like "K i l l   myself", "kiiill myself", "k!ll" or Cyrillic look-alikes
+#  reduce to the same form as the listed phrase.
+# ─────────────────────────────────────────────
+
+# Look-alike letters (Cyrillic / Greek) and common leetspeak → Latin
+_CONFUSABLES = {
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "у": "y", "х": "x",
+    "і": "i", "ј": "j", "ѕ": "s", "к": "k", "м": "m", "т": "t", "в": "b", "н": "h",
+    "α": "a", "ε": "e", "ο": "o", "ι": "i", "κ": "k", "ν": "v", "τ": "t", "ρ": "p",
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s",
+    "!": "i", "|": "l",
+}
+
+
+def _build_translation() -> dict:
+    table = {ord(k): v for k, v in _CONFUSABLES.items()}
+    for cp in range(0x10000):
+        ch = chr(cp)
+        if cp in table:
+            continue
+        category = unicodedata.category(ch)
+        if category[0] in "PS" or category in ("Cc", "Cf", "Zs", "Zl", "Zp"):
+            table[cp] = " "
+    for apostrophe in "'’‘`´":
+        table[ord(apostrophe)] = None  # "can't" → "cant"
+    return table
+
+
+_TRANSLATION = _build_translation()
+_SPACED_LETTERS = re.compile(r"(?<!\S)(?:\S )+\S(?!\S)")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def _strip_latin_accents(text: str) -> str:
+    out = []
+    for ch in unicodedata.normalize("NFKD", text):
+        if unicodedata.combining(ch) and out and out[-1].isascii():
+            continue  # é → e, but keep Devanagari/other script vowel signs
+        out.append(ch)
+    return unicodedata.normalize("NFC", "".join(out))
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _strip_latin_accents(text)
+    text = text.translate(_TRANSLATION)
+    text = " ".join(text.split())
+    text = _SPACED_LETTERS.sub(lambda m: m.group(0).replace(" ", ""), text)
+    return _REPEATS.sub(r"\1", text)
+
+
+# ─────────────────────────────────────────────
+#  PHRASE MATCHER
+#  All phrases are compiled into one trie-shaped regex at import, so a
+#  message is scanned once no matter how many phrases there are.
+# ─────────────────────────────────────────────
+
+def _trie_pattern(phrases, gap: str = "", whole: bool = False) -> str:
+    """
+    One regex for all phrases. `gap` is allowed between any two characters
+    (and a letter may repeat across it, as "want to" reads "wantto" once
+    joined); with `whole`, a match must start and end at word boundaries.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def atom(ch) -> str:
+        return re.escape(ch) + (f"(?:{gap}{re.escape(ch)})*" if gap else "")
+
+    def build(node) -> str:
+        if "" in node and not whole:
+            return ""  # a shorter phrase already matched — no need to go deeper
+        alts = [atom(ch) + (gap + build(child) if set(child) - {""} else build(child))
+                for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            alts.append("")  # the phrase may end here, or a longer one may carry on
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    pattern = build(trie)
+    return rf"(?<!\w){pattern}(?!\w)" if whole else pattern
+
+
+# A hyphen inside a word joins it ("self-portrait"), so compact matching
+# doesn't treat its parts as separate words
+_JOINING_HYPHEN = re.compile(r"(?<=\w)[-‐‑](?=\w)")
+
+
+class PhraseMatcher:
+    """Single-pass substring matcher over normalised text."""
+
+    def __init__(self, phrases, compact: bool = False):
+        normalised = {normalize_text(p) for p in phrases if p.strip()}
+        self.size = len(normalised)
+        self._regex = re.compile(_trie_pattern(normalised))
+        # Optionally also match phrases with their spaces moved or dropped:
+        # "killmyself", "kill my self", "k i l l my self". The match must
+        # start and end on word boundaries, with in-word hyphens kept as
+        # joins, so "hang my self-portrait" stays clear.
+        self._compact = re.compile(_trie_pattern(
+            {_REPEATS.sub(r"\1", p.replace(" ", "")) for p in normalised}, gap=" ?", whole=True)) if compact else None
+
+    def search(self, message: str) -> bool:
+        text = normalize_text(message)
+        if self._regex.search(text):
+            return True
+        return bool(self._compact and self._compact.search(normalize_text(_JOINING_HYPHEN.sub("", message))))
+
+
 # ─────────────────────────────────────────────
 #  CRISIS DETECTION
 # ─────────────────────────────────────────────
@@ -10,6 +128,16 @@ _CRISIS_KEYWORDS = [
     "overdose", "hang myself", "end it all", "can't go on",
 ]
 
+# Hindi / Hinglish
+_CRISIS_KEYWORDS_HI = [
+    "aatmahatya", "khudkushi", "marna chahta hoon", "marna chahti hoon",
+    "jeena nahi chahta", "jeena nahi chahti", "mar jaana chahta", "mar jaana chahti",
+    "आत्महत्या", "ख़ुदकुशी", "खुदकुशी", "मरना चाहता", "मरना चाहती",
+    "जीना नहीं चाहता", "जीना नहीं चाहती",
+]
+
+_CRISIS_MATCHER = PhraseMatcher(_CRISIS_KEYWORDS + _CRISIS_KEYWORDS_HI, compact=True)
+
 _CRISIS_RESPONSE = """I hear you, and I'm really glad you're talking right now. 💙
 
 What you're feeling is real — and you don't have to face this alone.
@@ -26,8 +154,7 @@ You matter more than you know. Please reach out to them right now. 💙"""
 
 def is_crisis(message: str) -> bool:
     """Returns True if message contains crisis keywords."""
-    msg = message.lower()
-    return any(k in msg for k in _CRISIS_KEYWORDS)
+    return _CRISIS_MATCHER.search(message)
 
 
 def get_crisis_response() -> str:
@@ -44,6 +171,8 @@ _OFF_TOPIC_KEYWORDS = [
     "translate this", "play a game", "who won",
 ]
 
+_OFF_TOPIC_MATCHER = PhraseMatcher(_OFF_TOPIC_KEYWORDS)
+
 _OFF_TOPIC_RESPONSE = (
     "I'm MindMate — I'm here just for your emotional wellbeing 😊 "
     "I'm not built for that kind of request, but I'm all ears "
@@ -53,8 +182,7 @@ _OFF_TOPIC_RESPONSE = (
 
 def is_off_topic(message: str) -> bool:
     """Returns True if message is clearly off-topic."""
-    msg = message.lower()
-    return any(k in msg for k in _OFF_TOPIC_KEYWORDS)
+    return _OFF_TOPIC_MATCHER.search(message)
 
 
 def get_off_topic_response() -> str:
@@ -0,0 +1,288 @@
+import os
+import re
+import math
+import base64
+import heapq
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from firebase_config import get_db_reference
+from archive import load_history, HOT_PATHS
+from db_cache import cached_get
+
+# Optional local embeddings, e.g. SEARCH_EMBED_MODEL=all-MiniLM-L6-v2
+# (needs sentence-transformers; BM25 alone is used without it)
+SEARCH_EMBED_MODEL = os.getenv("SEARCH_EMBED_MODEL", "")
+SEARCH_EMBED_WEIGHT = 0.5   # share of the hybrid score taken by cosine similarity
+SNIPPET_CHARS = 300
+
+BM25_K1 = 1.2
+BM25_B  = 0.75
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_STOPWORDS = frozenset("""
+a about after again all am an and any are as at be because been before being but by can
+could did do does doing don down for from had has have having he her here hers him his how
+i if in into is it its just me more most my myself no nor not now of off on once only or
+other our out over own same she should so some such than that the their them then there
+these they this those through to too under until up very was we were what when where which
+while who why will with would you your really like feel felt get got im ive
+""".split())
+_SUFFIXES = ("ingly", "fully", "ness", "ing", "ful", "ed", "ly", "es", "s")
+
+
+# ─────────────────────────────────────────────
+#  TOKENIZING
+# ─────────────────────────────────────────────
+
+def _stem(word: str) -> str:
+    """
+    Light suffix stripping so "stressed", "stressful" and "stress" share a
+    term. Two passes, so "mornings" → "morning" → "morn".
+    """
+    for _ in range(2):
+        for suffix in _SUFFIXES:
+            if (word.endswith(suffix) and len(word) - len(suffix) >= 3
+                    and not (suffix == "s" and word.endswith("ss"))):
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    return word
+
+
+def terms(text: str) -> list:
+    return [_stem(w) for w in _WORD_RE.findall((text or "").casefold()) if w not in _STOPWORDS]
+
+
+def _term_freqs(text: str) -> dict:
+    tf = {}
+    for term in terms(text):
+        tf[term] = tf.get(term, 0) + 1
+    return tf
+
+
+# ─────────────────────────────────────────────
+#  EMBEDDINGS (optional)
+# ─────────────────────────────────────────────
+
+_model = None
+
+
+def _embedder():
+    global _model
+    if not SEARCH_EMBED_MODEL:
+        return None
+    if _model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(SEARCH_EMBED_MODEL, device="cpu")
+        except Exception as e:
+            print(f"[SEARCH ERROR] embeddings disabled: {e}")
+            _model = False
+    return _model or None
+
+
+def _embed(text: str):
+    model = _embedder()
+    if model is None:
+        return None
+    return model.encode([text], normalize_embeddings=True)[0].astype("float16")
+
+
+def _pack(vec) -> str:
+    return base64.b64encode(vec.tobytes()).decode("ascii")
+
+
+def _unpack(data: str):
+    import numpy as np
+    return np.frombuffer(base64.b64decode(data), dtype=np.float16).astype(np.float32)
+
+
+# ─────────────────────────────────────────────
+#  INDEX
+#  search/{uid}/{collection}:
+#    docs/{key}           {"len", "snippet", "date", "emotion", ["vec"]}
+#    postings/{term}/{key} term frequency
+#    built                 set once the user's existing history is indexed
+#  Adding a document is one multi-path update touching only its own terms;
+#  document count and average length are derived from docs on load.
+# ─────────────────────────────────────────────
+
+class SearchIndex:
+    """In-memory BM25 inverted index, optionally blended with embedding similarity."""
+
+    def __init__(self, docs: dict = None, postings: dict = None):
+        self.docs = docs or {}
+        self.postings = postings or {}
+        self.total_len = sum(d.get("len", 0) for d in self.docs.values())
+        self._vectors = None
+
+    def add(self, key: str, text: str, meta: dict) -> dict:
+        """Index one document; returns the database changes relative to the index root."""
+        tf = _term_freqs(text)
+        doc = dict(meta, len=sum(tf.values()), snippet=text[:SNIPPET_CHARS])
+        vec = _embed(text)
+        if vec is not None:
+            doc["vec"] = _pack(vec)
+        changes = {f"docs/{key}": doc}
+        for term, count in tf.items():
+            self.postings.setdefault(term, {})[key] = count
+            changes[f"postings/{term}/{key}"] = count
+        self.total_len += doc["len"] - self.docs.get(key, {}).get("len", 0)
+        self.docs[key] = doc
+        self._vectors = None
+        return changes
+
+    def remove(self, key: str, text: str) -> dict:
+        """Drop one document; returns the database changes relative to the index root."""
+        doc = self.docs.pop(key, None)
+        if doc is not None:
+            self.total_len -= doc.get("len", 0)
+            self._vectors = None
+        changes = {f"docs/{key}": None}
+        for term in set(terms(text)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[term]
+            changes[f"postings/{term}/{key}"] = None
+        return changes
+
+    def _bm25(self, query_terms: list, allowed) -> dict:
+        n = len(self.docs)
+        avgdl = self.total_len / n if n else 1.0
+        scores = {}
+        for term in set(query_terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for key, tf in posting.items():
+                if (allowed is not None and key not in allowed) or key not in self.docs:
+                    continue
+                dl = self.docs.get(key, {}).get("len", avgdl)
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+                scores[key] = scores.get(key, 0.0) + idf * norm
+        return scores
+
+    def _cosine(self, query: str, allowed) -> dict:
+        qvec = _embed(query)
+        if qvec is None:
+            return {}
+        if self._vectors is None:
+            import numpy as np
+            keys = [k for k, d in self.docs.items() if d.get("vec")]
+            matrix = np.stack([_unpack(self.docs[k]["vec"]) for k in keys]) if keys else None
+            self._vectors = (keys, matrix)
+        keys, matrix = self._vectors
+        if matrix is None:
+            return {}
+        sims = matrix @ qvec.astype("float32")
+        return {k: float(s) for k, s in zip(keys, sims) if allowed is None or k in allowed}
+
+    def search(self, query: str, k: int = 10, emotions: list = None) -> list:
+        """Top-k [(key, score, doc)] for `query`, optionally limited to some emotions."""
+        allowed = None
+        if emotions:
+            allowed = {key for key, d in self.docs.items() if d.get("emotion") in emotions}
+        scores = self._bm25(terms(query), allowed)
+        cosine = self._cosine(query, allowed)
+        if cosine:
+            top = max(scores.values(), default=0.0) or 1.0
+            keys = set(scores) | {key for key, s in cosine.items() if s > 0.3}
+            scores = {
+                key: (1 - SEARCH_EMBED_WEIGHT) * scores.get(key, 0.0) / top
+                     + SEARCH_EMBED_WEIGHT * max(cosine.get(key, 0.0), 0.0)
+                for key in keys
+            }
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(key, score, self.docs[key]) for key, score in best if key in self.docs]
+
+
+# ─────────────────────────────────────────────
+#  PERSISTENCE
+# ─────────────────────────────────────────────
+
+def _path(user_id: str, collection: str) -> str:
+    return f"search/{user_id}/{collection}"
+
+
+# collection → (history kind, text field, meta fields, include archived items)
+# used for the initial build. Archived memory bullets were evicted on purpose,
+# so only the hot node is searchable.
+SOURCES = {
+    "journal": ("journal", "entry", {"date": "date", "emotion": "dominant_emotion"}, True),
+    "memory":  ("memory", "text", {}, False),   # older bullets are plain strings
+}
+
+
+def index_document(user_id: str, collection: str, key: str, text: str, meta: dict):
+    """
+    Add one document to the stored index: a single update, O(document size).
+    A copy this session already holds is updated in place too.
+    """
+    held = st.session_state.get("_search_indexes", {}) if get_script_run_ctx() else {}
+    index = held.get((user_id, collection)) or SearchIndex()
+    changes = index.add(key, text, meta)
+    get_db_reference(_path(user_id, collection)).update(changes)
+
+
+def remove_documents(user_id: str, collection: str, texts: dict):
+    """Drop documents {key: text} from the stored index (and this session's copy) in one update."""
+    held = st.session_state.get("_search_indexes", {}) if get_script_run_ctx() else {}
+    index = held.get((user_id, collection)) or SearchIndex()
+    changes = {}
+    for key, text in texts.items():
+        changes.update(index.remove(key, text))
+    if changes:
+        get_db_reference(_path(user_id, collection)).update(changes)
+
+
+def _build(user_id: str, collection: str) -> SearchIndex:
+    """First use for a user: index their full history in one write."""
+    kind, field, meta_fields, archived = SOURCES[collection]
+    if archived:
+        pairs = load_history(user_id, kind, keyed=True)
+    else:
+        hot = cached_get(user_id, HOT_PATHS[kind].format(uid=user_id)) or {}
+        if isinstance(hot, list):
+            hot = {f"-{i:019d}": v for i, v in enumerate(hot) if v is not None}
+        pairs = sorted(hot.items())
+    index = SearchIndex()
+    changes = {}
+    for key, item in pairs:
+        text = item if isinstance(item, str) else item.get(field, "")
+        meta = {name: item.get(src, "") for name, src in meta_fields.items()}
+        changes.update(index.add(key, text, meta))
+    changes["built"] = True
+    get_db_reference(_path(user_id, collection)).update(changes)
+    return index
+
+
+def load_index(user_id: str, collection: str) -> SearchIndex:
+    data = get_db_reference(_path(user_id, collection)).get()
+    if not data or not data.get("built"):
+        # documents indexed before the first build are simply re-added
+        return _build(user_id, collection)
+    return SearchIndex(data.get("docs"), data.get("postings"))
+
+
+def session_index(user_id: str, collection: str) -> SearchIndex:
+    """The index held for this session (loaded once); a fresh load outside a script run."""
+    if get_script_run_ctx() is None:
+        return load_index(user_id, collection)
+    held = st.session_state.setdefault("_search_indexes", {})
+    if (user_id, collection) not in held:
+        held[(user_id, collection)] = load_index(user_id, collection)
+    return held[(user_id, collection)]
+
+
+def drop_session_index(collection: str = None):
+    held = st.session_state.get("_search_indexes", {})
+    for key in [k for k in held if collection is None or k[1] == collection]:
+        del held[key]
+
+
+def search(user_id: str, collection: str, query: str, k: int = 10, emotions: list = None) -> list:
+    return session_index(user_id, collection).search(query, k, emotions)
@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import tempfile
+import threading
+import streamlit as st
+
+
+def _config(name: str, default: str = None):
+    """Environment first, then Streamlit secrets."""
+    if os.getenv(name):
+        return os.getenv(name)
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
+
+STORAGE_BACKEND = (_config("STORAGE_BACKEND", "firebase") or "firebase").lower()
+SQLITE_PATH     = _config("SQLITE_PATH", "mindmate.db")
+
+
+# ─────────────────────────────────────────────
+#  PUSH KEYS
+# ─────────────────────────────────────────────
+
+_PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_last_push_ms = 0
+_last_rand = []
+_push_lock = threading.Lock()
+
+
+def new_push_key() -> str:
+    """
+    Chronologically sortable child key in Firebase's push-ID format, generated
+    locally so an append can be written with a single child .set() / .update().
+    """
+    global _last_push_ms, _last_rand
+    with _push_lock:
+        now = int(time.time() * 1000)
+        if now == _last_push_ms:
+            # same millisecond: increment the random suffix to keep keys ordered
+            i = 11
+            while i >= 0 and _last_rand[i] == 63:
+                _last_rand[i] = 0
+                i -= 1
+            if i >= 0:
+                _last_rand[i] += 1
+        else:
+            _last_push_ms = now
+            _last_rand = [random.randrange(64) for _ in range(12)]
+        rand = list(_last_rand)
+
+    stamp = []
+    for _ in range(8):
+        stamp.append(_PUSH_CHARS[now % 64])
+        now //= 64
+    return "".join(reversed(stamp)) + "".join(_PUSH_CHARS[r] for r in rand)
+
+
+def push_key_time(key: str) -> float:
+    """Epoch seconds encoded in a push key (the first 8 characters)."""
+    ms = 0
+    for ch in key[:8]:
+        ms = ms * 64 + _PUSH_CHARS.index(ch)
+    return ms / 1000
+
+
+def _split(path: str) -> list:
+    return [p for p in (path or "").split("/") if p]
+
+
+# ─────────────────────────────────────────────
+#  FIREBASE BACKEND
+# ─────────────────────────────────────────────
+
+class FirebaseStorage:
+    """Firebase Realtime Database via firebase_admin (the production backend)."""
+
+    def __init__(self):
+        import firebase_admin
+        from firebase_admin import credentials, db
+
+        if not firebase_admin._apps:
+            firebase_json = json.loads(st.secrets["FIREBASE_JSON"])
+
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+                json.dump(firebase_json, f)
+                temp_path = f.name
+
+            cred = credentials.Certificate(temp_path)
+            firebase_admin.initialize_app(cred, {
+                "databaseURL": st.secrets["FIREBASE_DB_URL"]
+            })
+
+            os.unlink(temp_path)
+        self._db = db
+        self._app = firebase_admin.get_app()
+        self.rest_url = self._app.options.get("databaseURL").rstrip("/")
+
+    def reference(self, path: str):
+        return self._db.reference(path)
+
+    def access_token(self) -> str:
+        """OAuth token for the RTDB REST API (google-auth caches and refreshes it)."""
+        return self._app.credential.get_access_token().access_token
+
+
+# ─────────────────────────────────────────────
+#  SQLITE BACKEND
+#  The tree is stored flattened: one row per leaf value, keyed by its full
+#  path ("moods/uid/-Nx.../emotion") with the JSON-encoded scalar. A subtree
+#  read is a primary-key range scan on "path/".."path0" ('0' sorts right
+#  after '/').
+# ─────────────────────────────────────────────
+
+class SQLiteStorage:
+    """Local single-node backend with the same reference API the app uses."""
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS nodes (path TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._lock = threading.RLock()
+
+    def reference(self, path: str):
+        return SQLiteReference(self, "/".join(_split(path)))
+
+    # reads
+
+    def _rows(self, path: str) -> list:
+        if not path:
+            return self._conn.execute("SELECT path, value FROM nodes").fetchall()
+        return self._conn.execute(
+            "SELECT path, value FROM nodes WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, path + "/", path + "0"),
+        ).fetchall()
+
+    def read(self, path: str):
+        with self._lock:
+            rows = self._rows(path)
+        tree = {}
+        offset = len(_split(path))
+        for row_path, value in rows:
+            parts = _split(row_path)[offset:]
+            if not parts:
+                return json.loads(value)
+            node = tree
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = json.loads(value)
+        return _arrayify(tree) if tree else None
+
+    # writes (callers hold the lock and are inside a transaction)
+
+    def _delete(self, path: str):
+        if not path:
+            self._conn.execute("DELETE FROM nodes")
+            return
+        self._conn.execute(
+            "DELETE FROM nodes WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, path + "/", path + "0"),
+        )
+
+    def _write(self, path: str, value):
+        self._delete(path)
+        parts = _split(path)
+        for i in range(1, len(parts)):
+            # a scalar can't have children — drop any leaf sitting on an ancestor
+            self._conn.execute("DELETE FROM nodes WHERE path = ?", ("/".join(parts[:i]),))
+        rows = list(_flatten(path, value))
+        if rows:
+            self._conn.executemany("INSERT OR REPLACE INTO nodes (path, value) VALUES (?, ?)", rows)
+
+    def write(self, path: str, value):
+        self.write_many({path: value})
+
+    def transact(self, path: str, fn):
+        """Read-modify-write of one node under a write lock; returns the new value."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(self.read(path))
+                self._write(path, value)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def write_many(self, changes: dict):
+        """Apply {path: value-or-None} atomically."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for path, value in changes.items():
+                    self._write(path, value)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+def _flatten(path: str, value):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _flatten(f"{path}/{k}" if path else str(k), v)
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value):
+            yield from _flatten(f"{path}/{i}" if path else str(i), v)
+    elif value is not None:
+        yield path, json.dumps(value)
+
+
+def _arrayify(node):
+    """Mirror Firebase: objects whose keys are mostly-dense integers come back as lists."""
+    if not isinstance(node, dict):
+        return node
+    node = {k: _arrayify(v) for k, v in node.items()}
+    if node and all(k.isdigit() for k in node):
+        top = max(int(k) for k in node)
+        if top < 2 * len(node):
+            return [node.get(str(i)) for i in range(top + 1)]
+    return node
+
+
+class SQLiteReference:
+    def __init__(self, storage: SQLiteStorage, path: str):
+        self._storage = storage
+        self.path = path
+
+    @property
+    def key(self):
+        parts = _split(self.path)
+        return parts[-1] if parts else None
+
+    def child(self, path: str):
+        return SQLiteReference(self._storage, "/".join(_split(self.path) + _split(path)))
+
+    def get(self, shallow: bool = False):
+        value = self._storage.read(self.path)
+        if shallow and isinstance(value, (dict, list)):
+            items = value.items() if isinstance(value, dict) else enumerate(value)
+            return {str(k): (v if not isinstance(v, (dict, list)) else True)
+                    for k, v in items if v is not None}
+        return value
+
+    def set(self, value):
+        self._storage.write(self.path, value)
+
+    def update(self, value: dict):
+        self._storage.write_many({
+            "/".join(_split(self.path) + _split(k)): v for k, v in value.items()
+        })
+
+    def push(self, value=""):
+        ref = self.child(new_push_key())
+        ref.set(value)
+        return ref
+
+    def delete(self):
+        self._storage.write(self.path, None)
+
+    def transaction(self, fn):
+        return self._storage.transact(self.path, fn)
+
+    def order_by_key(self):
+        return SQLiteQuery(self)
+
+
+class SQLiteQuery:
+    """The subset of Firebase queries the app uses: order_by_key with ranges and limits."""
+
+    def __init__(self, ref: SQLiteReference):
+        self._ref = ref
+        self._start = self._end = None
+        self._first = self._last = None
+
+    def start_at(self, key):
+        self._start = key
+        return self
+
+    def end_at(self, key):
+        self._end = key
+        return self
+
+    def limit_to_first(self, n: int):
+        self._first = n
+        return self
+
+    def limit_to_last(self, n: int):
+        self._last = n
+        return self
+
+    def get(self):
+        value = self._ref.get()
+        if value is None:
+            return {}
+        if isinstance(value, list):
+            value = {str(i): v for i, v in enumerate(value) if v is not None}
+        keys = sorted(value)
+        if self._start is not None:
+            keys = [k for k in keys if k >= self._start]
+        if self._end is not None:
+            keys = [k for k in keys if k <= self._end]
+        if self._first is not None:
+            keys = keys[:self._first]
+        if self._last is not None:
+            keys = keys[-self._last:] if self._last else []
+        return {k: value[k] for k in keys}
+
+
+# ─────────────────────────────────────────────
+#  BACKEND SELECTION
+# ─────────────────────────────────────────────
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """The configured backend: STORAGE_BACKEND = "firebase" (default) or "sqlite"."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "sqlite":
+                _storage = SQLiteStorage(SQLITE_PATH)
+            elif STORAGE_BACKEND == "firebase":
+                _storage = FirebaseStorage()
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        return _storage
+
+
+def set_storage(storage):
+    """Swap the backend (e.g. an in-memory SQLiteStorage(":memory:") for benchmarks)."""
+    global _storage
+    _storage = storage
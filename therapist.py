@@ -1,10 +1,4 @@
-from groq import Groq
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-MODEL = "llama-3.3-70b-versatile"
+from llm import chat_completion
 
 CBT_STEPS = [
     {
@@ -50,10 +44,9 @@ def process_cbt_response(step_index: int, user_response: str, session_history: l
         messages.append({"role": msg["role"], "content": msg["content"]})
     messages.append({"role": "user", "content": user_response})
     try:
-        response = client.chat.completions.create(
-            model=MODEL, messages=messages, max_tokens=300, temperature=0.75
+        return chat_completion(
+            "therapist.cbt_step", messages=messages, max_tokens=300, temperature=0.75
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"[CBT ERROR] {e}")
         return "I'm here with you. Take your time. 💙"
@@ -62,8 +55,8 @@ def process_cbt_response(step_index: int, user_response: str, session_history: l
 def generate_insight_card(session_history: list, user_name: str) -> str:
     convo = "\n".join([f"{m['role'].upper()}: {m['content']}" for m in session_history])
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        return chat_completion(
+            "therapist.insight",
             messages=[
                 {
                     "role": "system",
@@ -82,7 +75,6 @@ def generate_insight_card(session_history: list, user_name: str) -> str:
             ],
             max_tokens=300, temperature=0.7
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"[INSIGHT ERROR] {e}")
         return f"🌱 **Your Session Insight**\n\nThank you for sharing today, {user_name}. Every step forward counts. 💙"
\ No newline at end of file
@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_METRICS_PORT = int(os.getenv("TRACE_METRICS_PORT", "0"))   # 0 = no Prometheus endpoint
+TRACE_DUMP_PATH    = os.getenv("TRACE_DUMP_PATH", "")            # "" = no JSON dump
+TRACE_DUMP_EVERY   = float(os.getenv("TRACE_DUMP_EVERY", "60"))
+TRACE_PANEL        = os.getenv("TRACE_PANEL", "") == "1"         # sidebar waterfall
+TRACE_WINDOW       = 2000                                        # durations kept per series
+
+# Frames from these modules are skipped when naming a storage call site
+_PLUMBING = {__name__, "firebase_config", "db_cache", "storage"}
+
+
+# ─────────────────────────────────────────────
+#  RERUN CONTEXT
+#  One Trace per script run (or background job). It lives in a ContextVar,
+#  so it follows the script thread and any work submitted with
+#  contextvars.copy_context().run.
+# ─────────────────────────────────────────────
+
+class Trace:
+    def __init__(self, user_id: str, tab: str, rerun_id: str = None):
+        self.user_id = user_id or "-"
+        self.tab = tab or "-"
+        self.rerun_id = rerun_id or uuid.uuid4().hex[:8]
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+def begin_rerun(user_id: str, tab: str) -> Trace:
+    """Start a fresh trace for this script run; spans recorded afterwards attach to it."""
+    trace = Trace(user_id, tab)
+    _current.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextmanager
+def job_trace(user_id: str, job_type: str):
+    """Trace a background job; its spans are tagged tab="job", rerun=job_type."""
+    token = _current.set(Trace(user_id, "job", job_type))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# ─────────────────────────────────────────────
+#  SPANS
+# ─────────────────────────────────────────────
+
+_series = {}
+_series_lock = threading.Lock()
+
+
+def _aggregate(name: str, site: str, seconds: float, ok: bool):
+    with _series_lock:
+        s = _series.setdefault((name, site), {"count": 0, "errors": 0, "durations": deque(maxlen=TRACE_WINDOW)})
+        s["count"] += 1
+        s["errors"] += 0 if ok else 1
+        s["durations"].append(seconds)
+
+
+@contextmanager
+def span(name: str, site: str):
+    """Time the enclosed block as `name` (e.g. "db.get", "llm.chat") at call site `site`."""
+    trace = _current.get()
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _aggregate(name, site, seconds, ok)
+        if trace is not None:
+            trace.spans.append({
+                "name": name, "site": site, "ok": ok,
+                "start": start - trace.started, "seconds": seconds,
+                "user": trace.user_id, "tab": trace.tab, "rerun": trace.rerun_id,
+            })
+
+
+def _caller_site() -> str:
+    """module.function of the first frame outside the storage plumbing."""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get("__name__") in _PLUMBING:
+        frame = frame.f_back
+    if frame is None:
+        return "-"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+# ─────────────────────────────────────────────
+#  TRACED STORAGE REFERENCES
+# ─────────────────────────────────────────────
+
+class TracedReference:
+    """Wraps a backend reference; each network call becomes a db.* span."""
+
+    def __init__(self, ref):
+        self._ref = ref
+
+    @property
+    def key(self):
+        return self._ref.key
+
+    def child(self, path):
+        return TracedReference(self._ref.child(path))
+
+    def _call(self, op: str, *args, **kwargs):
+        with span(f"db.{op}", _caller_site()):
+            return getattr(self._ref, op)(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        return self._call("get", *args, **kwargs)
+
+    def set(self, value):
+        return self._call("set", value)
+
+    def update(self, value):
+        return self._call("update", value)
+
+    def push(self, value=""):
+        return TracedReference(self._call("push", value))
+
+    def delete(self):
+        return self._call("delete")
+
+    def transaction(self, fn):
+        return self._call("transaction", fn)
+
+    def order_by_key(self):
+        return TracedQuery(self._ref.order_by_key())
+
+
+class TracedQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        method = getattr(self._query, name)
+
+        def chained(*args, **kwargs):
+            result = method(*args, **kwargs)
+            return self if result is self._query else result
+        return chained
+
+    def get(self):
+        with span("db.query", _caller_site()):
+            return self._query.get()
+
+
+# ─────────────────────────────────────────────
+#  EXPORT
+# ─────────────────────────────────────────────
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def snapshot() -> dict:
+    """{"name site": {count, errors, p50, p95, p99, max}} in seconds."""
+    with _series_lock:
+        series = {key: (s["count"], s["errors"], sorted(s["durations"])) for key, s in _series.items()}
+    return {
+        f"{name} {site}": {
+            "count": count, "errors": errors,
+            "p50": round(_percentile(d, 0.50), 6),
+            "p95": round(_percentile(d, 0.95), 6),
+            "p99": round(_percentile(d, 0.99), 6),
+            "max": round(d[-1] if d else 0.0, 6),
+        }
+        for (name, site), (count, errors, d) in sorted(series.items())
+    }
+
+
+# name → (collect() -> dict, samples(dict) -> [(metric, labels, value, type)])
+_collectors = {}
+
+
+def register_metrics(name: str, collect, samples):
+    """
+    Export a module's own counters next to the spans: collect()'s dict goes
+    into the JSON dump under `name`, and samples(collected) gives the
+    Prometheus lines as (metric, {label: value}, value, "counter" | "gauge").
+    """
+    _collectors[name] = (collect, samples)
+
+
+def collected() -> dict:
+    out = {}
+    for name, (collect, _) in list(_collectors.items()):
+        try:
+            out[name] = collect()
+        except Exception as e:
+            print(f"[TRACE ERROR] metrics {name}: {e}")
+    return out
+
+
+def _collector_lines(data: dict) -> list:
+    by_metric = {}
+    for name, (_, samples) in list(_collectors.items()):
+        if name not in data:
+            continue
+        for metric, labels, value, kind in samples(data[name]):
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            by_metric.setdefault((metric, kind), []).append(
+                f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+    lines = []
+    for (metric, kind), samples_ in by_metric.items():
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(samples_)
+    return lines
+
+
+def prometheus_text() -> str:
+    lines = [
+        "# HELP mindmate_span_seconds Storage and LLM call latency.",
+        "# TYPE mindmate_span_seconds summary",
+    ]
+    errors = ["# TYPE mindmate_span_errors_total counter"]
+    for key, s in snapshot().items():
+        name, site = key.split(" ", 1)
+        labels = f'name="{name}",site="{site}"'
+        for q, field in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+            lines.append(f'mindmate_span_seconds{{{labels},quantile="{q}"}} {s[field]}')
+        lines.append(f"mindmate_span_seconds_count{{{labels}}} {s['count']}")
+        errors.append(f"mindmate_span_errors_total{{{labels}}} {s['errors']}")
+    return "\n".join(lines + errors + _collector_lines(collected())) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port: int):
+    """Serve prometheus_text() on http://0.0.0.0:{port}/ from a daemon thread."""
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    except OSError as e:
+        print(f"[TRACE ERROR] metrics port {port}: {e}")
+        return
+    threading.Thread(target=server.serve_forever, daemon=True, name="trace-metrics").start()
+
+
+def _dump_loop(path: str, every: float):
+    while True:
+        time.sleep(every)
+        try:
+            with open(path, "w") as f:
+                json.dump({"at": time.time(), "spans": snapshot(), **collected()}, f, indent=2)
+        except Exception as e:
+            print(f"[TRACE ERROR] dump to {path}: {e}")
+
+
+# Modules are imported once per process, so these start once
+if TRACE_METRICS_PORT:
+    start_metrics_server(TRACE_METRICS_PORT)
+if TRACE_DUMP_PATH:
+    threading.Thread(target=_dump_loop, args=(TRACE_DUMP_PATH, TRACE_DUMP_EVERY),
+                     daemon=True, name="trace-dump").start()